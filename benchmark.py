@@ -0,0 +1,324 @@
+import argparse
+import io
+import json
+import multiprocessing  # Each format runs in its own process so peak memory is measured per format
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+import bulkload  # Bulk-load strategies for DataFrames
+import dbengine  # Shared, pooled database engine
+import filestore  # tblFile storage operations
+import genfile  # Parallel Gen File pipeline
+import jobcache  # Cached tblFileJob metadata
+
+# Gen File benchmark: generates synthetic files of every supported format, imports them into a local
+# SQLite database and runs Gen File over them, then writes per-format timings to a JSON file.
+# Example: python benchmark.py --rows 100000 --files 4 --output bench.json --compare bench_before.json
+# No SQL Server is needed: the import step stores the blobs with a plain INSERT (the T-SQL import batch
+# of filestore.import_file needs SQL Server), and Gen File reads them back from SQLite.
+
+# Formats: name -> (TypeFile, file extension)
+FORMATS = {
+    "xml": (".xml", ".xml"),
+    "xlsx": (".xlsx", ".xlsx"),
+    "csv_pipe": (".csv", ".csv"),
+    "csv_comma": (".csv", ".csv"),
+}
+
+# Thai and Latin words for text columns; CSV files are written in iso8859_11 like the exports Gen File reads
+WORDS = ["สินค้า", "ลูกค้า", "กรุงเทพมหานคร", "เชียงใหม่", "ขอนแก่น", "ชำระแล้ว", "ค้างชำระ", "Sales", "Stock", "North"]
+
+# Namespace of SpreadsheetML (Excel 2003 XML)
+SS_NAMESPACE = "urn:schemas-microsoft-com:office:spreadsheet"
+
+# Function to build one synthetic row: an id, a date, an amount, a count and text columns
+def make_row(rng, row_index, columns):
+    row = [
+        str(row_index + 1),
+        f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        f"{rng.uniform(0, 100000):.2f}",
+        str(rng.randint(0, 500)),
+    ]
+    while len(row) < columns:
+        row.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))))
+    return row[:columns]
+
+# Function to generate a SpreadsheetML workbook of rows x columns text cells
+def make_xml(rng, rows, columns):
+    out = io.StringIO()
+    out.write(f'<?xml version="1.0" encoding="utf-8"?><Workbook xmlns="{SS_NAMESPACE}" xmlns:ss="{SS_NAMESPACE}"><Worksheet ss:Name="Sheet1"><Table>')
+    for row_index in range(rows):
+        out.write("<Row>")
+        for value in make_row(rng, row_index, columns):
+            out.write(f'<Cell><Data ss:Type="String">{value}</Data></Cell>')
+        out.write("</Row>")
+    out.write("</Table></Worksheet></Workbook>")
+    return out.getvalue().encode("utf-8")
+
+# Function to generate an XLSX workbook with sheets sheets of rows x columns cells (numbers stay numbers)
+def make_xlsx(rng, rows, columns, sheets):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for sheet_index in range(sheets):
+        sheet = workbook.create_sheet(f"Sheet{sheet_index + 1}")
+        for row_index in range(rows):
+            row = make_row(rng, row_index, columns)
+            sheet.append([int(row[0]), row[1], float(row[2]), int(row[3])] + row[4:])
+    out = io.BytesIO()
+    workbook.save(out)
+    return out.getvalue()
+
+# Function to generate a CSV file in iso8859_11 with the given delimiter
+def make_csv(rng, rows, columns, delimiter):
+    lines = [delimiter.join(make_row(rng, row_index, columns)) for row_index in range(rows)]
+    return ("\n".join(lines) + "\n").encode("iso8859_11")
+
+# Function to generate one synthetic file of a format
+def make_file(format_name, rng, rows, columns, sheets):
+    if format_name == "xml":
+        return make_xml(rng, rows, columns)
+    elif format_name == "xlsx":
+        return make_xlsx(rng, rows, columns, sheets)
+    elif format_name == "csv_pipe":
+        return make_csv(rng, rows, columns, "|")
+    return make_csv(rng, rows, columns, ",")
+
+# Function to read this process's peak resident memory in MB (None where it cannot be measured)
+def peak_rss_mb():
+    try:
+        import resource
+        usage = [resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+        scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # bytes on macOS, KB elsewhere
+        return max(usage) / scale
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)  # Windows
+    except (ImportError, AttributeError):
+        return None
+
+# Function to benchmark one format in a fresh process and return its results dict
+def run_format(format_name, rows, columns, sheets, files, parse_workers, load_workers, work_dir, seed):
+    rng = random.Random(seed)
+    type_file, extension = FORMATS[format_name]
+    name_job = f"bench_{format_name}"
+    db_path = os.path.join(work_dir, f"{format_name}.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    dbengine.init_engine(engine)
+    jobcache.prime({name_job: type_file})
+
+    # Count every statement sent to the database (executemany counts once, like one round trip);
+    # SQLite has no dbo schema, so it is dropped from the statements Gen File writes
+    round_trips = [0]
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def count_round_trip(connection, cursor, statement, parameters, context, executemany):
+        round_trips[0] += 1
+        return statement.replace("[dbo].", ""), parameters
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE tblFile (NameJob TEXT, NameFile TEXT PRIMARY KEY, TypeFile TEXT, HashFile BLOB, binDataFile BLOB)"))
+        connection.execute(text("CREATE TABLE tblFileLoad (TableName TEXT, HashFile BLOB, FileIndex INT, TableCount INT, LoadedAt TEXT, PRIMARY KEY (TableName, HashFile))"))
+
+    # Generate the files on disk so the import step reads them like real exports
+    start = time.perf_counter()
+    paths = []
+    for file_index in range(files):
+        path = os.path.join(work_dir, f"{format_name}_{file_index}{extension}")
+        with open(path, "wb") as file:
+            file.write(make_file(format_name, rng, rows, columns, sheets))
+        paths.append(path)
+    generate_seconds = time.perf_counter() - start
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+
+    # Import: hash and store every file
+    round_trips[0] = 0
+    start = time.perf_counter()
+    for path in paths:
+        file_hash = filestore.file_sha256(path)
+        with open(path, "rb") as file:
+            data = file.read()
+        with dbengine.begin() as connection:
+            connection.execute(
+                text("INSERT INTO tblFile (NameJob, NameFile, TypeFile, HashFile, binDataFile) VALUES (:job, :name, :type, :hash, :data)"),
+                {"job": name_job, "name": os.path.basename(path), "type": type_file, "hash": file_hash, "data": data},
+            )
+    import_seconds = time.perf_counter() - start
+    import_round_trips = round_trips[0]
+
+    # Function to stream the stored blobs in Gen File order, as filestore.iter_blobs does
+    def blobs():
+        with dbengine.connect() as connection:
+            result = connection.execute(text("SELECT NameJob, NameFile, TypeFile, HashFile, binDataFile FROM tblFile ORDER BY NameFile"))
+            for index, row in enumerate(result):
+                yield (index,) + tuple(row)
+
+    # Parse only, in this process, to separate parse time from load time
+    start = time.perf_counter()
+    parsed_rows = 0
+    for index, row_job, name_file, row_type, file_hash, data in blobs():
+        for table_name, df, error_prefix in genfile.iter_file(index, row_job, name_file, row_type, data, "BENCH"):
+            parsed_rows += len(df)
+    parse_seconds = time.perf_counter() - start
+
+    # Gen File end to end: fetch, parse and load
+    problems = []
+    bulkload.reset_stats()
+    round_trips[0] = 0
+    summary = genfile.run_gen_file(
+        "BENCH",
+        report=lambda level, title, message: problems.append({"level": level, "title": title, "message": message}),
+        parse_workers=parse_workers,
+        load_workers=load_workers,
+        blobs=blobs(),
+    )
+    strategies = bulkload.strategy_stats()
+    load_seconds = sum(totals["seconds"] for totals in strategies.values())
+    dbengine.dispose_engine()
+
+    return {
+        "files": files,
+        "bytes": total_bytes,
+        "rows": summary["rows"],
+        "generate_seconds": generate_seconds,
+        "import_seconds": import_seconds,
+        "import_round_trips": import_round_trips,
+        "parse_seconds": parse_seconds,
+        "parsed_rows": parsed_rows,
+        "load_seconds": load_seconds,
+        "gen_file_seconds": summary["seconds"],
+        "gen_file_round_trips": round_trips[0],
+        "rows_per_sec": summary["rows"] / summary["seconds"] if summary["seconds"] > 0 else 0.0,
+        "mb_per_sec": total_bytes / (1024 * 1024) / summary["seconds"] if summary["seconds"] > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "strategies": strategies,
+        "problems": problems,
+    }
+
+# Function to reduce a loaded or expected value to a comparable one (None for missing, dates as YYYY-MM-DD)
+def plain_value(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()[:10]
+    if isinstance(value, float):
+        return round(value, 6)
+    return str(value)
+
+# Function to load one DataFrame with every strategy that runs on SQLite, replacing and then appending,
+# and check that the table reads back the same rows; returns a list of failure messages (empty when all pass)
+def check_strategies(rows=2500, columns=12, seed=1):
+    rng = random.Random(seed)
+    df = pd.DataFrame([make_row(rng, row_index, columns) for row_index in range(rows)], columns=[f"{i}" for i in range(columns)])
+    df["0"] = df["0"].astype("int64")
+    df["1"] = pd.to_datetime(df["1"])
+    df["2"] = df["2"].astype(float)
+    df.loc[df.index % 7 == 0, "4"] = None  # Empty fields must stay NULL
+    typed = df.copy()
+    typed.attrs["sql_types"] = {"0": "int", "1": "date", "2": "float", "3": "nvarchar(10)", "4": "nvarchar(max)"}
+    expected = [tuple(plain_value(value) for value in row) for row in df.itertuples(index=False)]
+
+    failures = []
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        for strategy in ("executemany", "multi_values"):
+            for label, frame in (("inferred", df), ("typed", typed)):
+                table_name = f"check_{strategy}_{label}"
+                try:
+                    bulkload.load_dataframe(frame, table_name, "replace", strategy, connection)
+                    bulkload.load_dataframe(frame, table_name, "append", strategy, connection)
+                    # SQLite keeps dates as text, so they are parsed back before comparing
+                    result = pd.read_sql(text(f'SELECT * FROM "{table_name}" ORDER BY rowid'), connection, parse_dates=["1"])
+                    loaded = [tuple(plain_value(value) for value in row) for row in result.itertuples(index=False)]
+                except Exception as e:
+                    failures.append(f"{strategy} ({label}): {e}")
+                    continue
+                if loaded != expected * 2:
+                    mismatch = next((i for i, (a, b) in enumerate(zip(loaded, expected * 2)) if a != b), min(len(loaded), len(expected) * 2))
+                    failures.append(f"{strategy} ({label}): {len(loaded)} rows read back for {len(expected) * 2} loaded, first difference at row {mismatch}")
+    engine.dispose()
+    return failures
+
+# Function to print how each format's main numbers changed against an earlier results file
+def compare(results, previous):
+    lines = []
+    for format_name, current in results["formats"].items():
+        before = previous.get("formats", {}).get(format_name)
+        if not before:
+            continue
+        changes = []
+        for key in ("parse_seconds", "load_seconds", "gen_file_seconds", "rows_per_sec", "peak_rss_mb", "gen_file_round_trips"):
+            if before.get(key) and current.get(key) is not None:
+                changes.append(f"{key} {before[key]:,.2f} -> {current[key]:,.2f} ({(current[key] - before[key]) / before[key]:+.0%})")
+        lines.append(f"{format_name}: " + ", ".join(changes))
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark import and Gen File on synthetic XML, XLSX and CSV files against a local SQLite database.")
+    parser.add_argument("--formats", default=",".join(FORMATS), help=f"Comma-separated formats (default: {','.join(FORMATS)})")
+    parser.add_argument("--rows", type=int, default=20000, help="Rows per file (per sheet for XLSX)")
+    parser.add_argument("--columns", type=int, default=10, help="Columns per row (at least 4)")
+    parser.add_argument("--sheets", type=int, default=3, help="Sheets per XLSX file")
+    parser.add_argument("--files", type=int, default=2, help="Files per format")
+    parser.add_argument("--parse-workers", type=int, default=genfile.parse_workers, help="Gen File parse processes (default: GENFILE_PARSE_WORKERS)")
+    parser.add_argument("--load-workers", type=int, default=genfile.load_workers, help="Gen File load threads (default: GENFILE_LOAD_WORKERS)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed, so runs generate the same files")
+    parser.add_argument("--output", default="benchmark.json", help="JSON results file")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--check", action="store_true", help="Only check that the executemany and multi_values loads read back unchanged on SQLite")
+    args = parser.parse_args(argv)
+    if args.check:
+        failures = check_strategies(seed=args.seed)
+        for failure in failures:
+            print(f"FAILED {failure}", file=sys.stderr)
+        print("bulk-load check: " + ("failed" if failures else "ok"), file=sys.stderr)
+        return 1 if failures else 0
+    formats = [format_name.strip() for format_name in args.formats.split(",") if format_name.strip()]
+    unknown = [format_name for format_name in formats if format_name not in FORMATS]
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(unknown)}")
+
+    results = {
+        "started": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "settings": {
+            "rows": args.rows, "columns": max(args.columns, 4), "sheets": args.sheets, "files": args.files,
+            "parse_workers": args.parse_workers, "load_workers": args.load_workers, "seed": args.seed,
+            "batch_rows": genfile.batch_rows, "stream_threshold": genfile.stream_threshold, "typed_load": genfile.typed_load,
+            "xlsx_engine": genfile.xlsx_engine, "bulk_chunksize": bulkload.executemany_chunksize,
+        },
+        "formats": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="genfile_bench_") as work_dir:
+        for format_name in formats:
+            # A fresh spawned process per format: peak memory and imports are not shared between formats
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                results["formats"][format_name] = executor.submit(
+                    run_format, format_name, args.rows, max(args.columns, 4), args.sheets, args.files,
+                    args.parse_workers, args.load_workers, work_dir, args.seed,
+                ).result()
+            format_results = results["formats"][format_name]
+            print(f"{format_name}: {format_results['rows']:,} rows, parse {format_results['parse_seconds']:.2f}s, "
+                  f"Gen File {format_results['gen_file_seconds']:.2f}s ({format_results['rows_per_sec']:,.0f} rows/s), "
+                  f"peak {format_results['peak_rss_mb'] or 0:,.0f} MB, {format_results['gen_file_round_trips']} round trips", file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            print(compare(results, json.load(file)), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    # Let frozen (PyInstaller) worker processes start without running the benchmark again
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import tempfile
+import threading  # Import threading module
+import config  # Loads .env once for every module
+import blobstore  # In-memory or spilled blobs for Gen File
+
+# Local copies of tblFile content, so Gen File reads files this machine already has from disk instead of the server.
+# Entries are named by the file's HashFile (SHA-256), so a file keeps its entry under any name and a file
+# whose content changed gets a new one. Each entry is checked against its size and hash before it is used.
+# The least recently used entries are removed once the folder grows past BLOB_CACHE_MAX_MB.
+
+# Blob cache settings (override in .env)
+cache_dir = os.getenv("BLOB_CACHE_DIR", "blob_cache")  # Folder of the cached files; empty: off
+max_bytes = int(float(os.getenv("BLOB_CACHE_MAX_MB", "2048")) * 1024 * 1024)  # Size limit of the folder; 0: off
+
+# Extension of a cached file; anything else in the folder (e.g. a copy in progress) is left alone
+ENTRY_SUFFIX = ".blob"
+
+# Bytes read at a time when hashing or copying
+COPY_CHUNK = 4 * 1024 * 1024
+
+_lock = threading.Lock()
+
+# Function to tell whether the cache is switched on
+def enabled():
+    return bool(cache_dir) and max_bytes > 0
+
+# Function to return the path of the entry for a HashFile value
+def entry_path(file_hash):
+    return os.path.join(cache_dir, bytes(file_hash).hex() + ENTRY_SUFFIX)
+
+# Function to tell whether an entry exists for a HashFile value (without checking it; see get)
+def contains(file_hash):
+    return enabled() and file_hash is not None and os.path.isfile(entry_path(file_hash))
+
+# Function to return the SHA-256 of a file on disk
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(COPY_CHUNK), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+# Function to return the cached content of a file as a blobstore.Blob, or None when it is not cached
+# size is the file's size on the server; an entry of another size or hash is removed and None returned.
+def get(file_hash, size):
+    if not contains(file_hash):
+        return None
+    path = entry_path(file_hash)
+    try:
+        if os.path.getsize(path) != size or file_digest(path) != bytes(file_hash):
+            remove(path)
+            return None
+        os.utime(path)  # Most recently used
+        return blobstore.Blob(path=path)
+    except OSError:
+        return None  # Removed by another process meanwhile
+
+# Function to copy a local file into the cache under its HashFile value
+def put_file(file_hash, file_path):
+    with open(file_path, "rb") as source:
+        put_stream(file_hash, source, os.path.getsize(file_path))
+
+# Function to copy a blobstore.Blob into the cache under its HashFile value
+def put_blob(file_hash, blob):
+    with blob.open() as source:
+        put_stream(file_hash, source, len(blob))
+
+# Function to write a file object into the cache, then evict the oldest entries beyond the size limit
+# The copy is written under a temporary name and renamed when complete, so a reader never sees half a file;
+# content that does not match file_hash is not kept. Content larger than a quarter of the limit is not cached.
+def put_stream(file_hash, source, size):
+    if not enabled() or file_hash is None or size > max_bytes // 4:
+        return
+    path = entry_path(file_hash)
+    if os.path.isfile(path):
+        os.utime(path)
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(prefix="copy_", suffix=".tmp", dir=cache_dir)
+    try:
+        digest = hashlib.sha256()
+        with os.fdopen(descriptor, "wb") as target:
+            for chunk in iter(lambda: source.read(COPY_CHUNK), b""):
+                digest.update(chunk)
+                target.write(chunk)
+        if digest.digest() != bytes(file_hash):
+            raise ValueError("content does not match its hash")
+        os.replace(temp_path, path)
+    except Exception:
+        remove(temp_path)
+        raise
+    evict()
+
+# Function to remove the least recently used entries until the folder fits in max_bytes
+def evict():
+    with _lock:
+        entries = []
+        try:
+            with os.scandir(cache_dir) as scan:
+                for entry in scan:
+                    if entry.name.endswith(ENTRY_SUFFIX) and entry.is_file():
+                        info = entry.stat()
+                        entries.append((info.st_mtime, info.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for used, size, path in entries)
+        for used, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            if remove(path):
+                total -= size
+
+# Function to delete a file, ignoring one that is gone or still open (Windows); returns True when deleted
+def remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
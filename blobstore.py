@@ -0,0 +1,73 @@
+import io
+import mmap
+import os
+import tempfile
+import config  # Loads .env once for every module
+
+# Blob settings (override in .env)
+spill_threshold = int(float(os.getenv("GENFILE_SPILL_THRESHOLD_MB", "16")) * 1024 * 1024)  # Blobs this large are downloaded to a temp file
+spill_dir = os.getenv("GENFILE_SPILL_DIR", "") or None  # Folder for the temp files; empty: the system temp folder
+
+# One file's content for the parsers, either in memory (bytes) or in a file on disk (path)
+# The parsers read it through open() (a file object) and view() (a memoryview or mmap) so the content
+# is not copied again: BytesIO shares the bytes it is given, and a file is read or mapped from disk.
+# A file-backed blob pickles as its path only, so a worker process reads the file itself.
+class Blob:
+    def __init__(self, data=None, path=None, temporary=False):
+        self.data = data
+        self.path = path
+        self.temporary = temporary  # Delete the file on close()
+        self.size = len(data) if data is not None else os.path.getsize(path)
+        self._map = None
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        # The receiving process only reads the blob; the sender deletes a temporary file
+        return {"data": self.data, "path": self.path, "temporary": False, "size": self.size, "_map": None}
+
+    # Function to open the content as a binary file object (close it when done)
+    def open(self):
+        if self.path is not None:
+            return open(self.path, "rb")
+        return io.BytesIO(self.data)
+
+    # Function to return the content as a buffer without copying it (memoryview or read-only mmap)
+    def view(self):
+        if self.path is None or self.size == 0:
+            return memoryview(self.data if self.data is not None else b"")
+        if self._map is None:
+            with open(self.path, "rb") as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    # Function to return the first size bytes as bytes
+    def head(self, size):
+        return bytes(self.view()[:size])
+
+    # Function to unmap the file and delete it when it is a temporary download
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self.temporary and self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass  # Still open elsewhere (Windows); the temp folder is cleaned by the system
+            self.path = None
+            self.temporary = False
+
+# Function to wrap bytes (or an existing Blob) as a Blob
+def as_blob(data):
+    if isinstance(data, Blob):
+        return data
+    return Blob(data=bytes(data) if not isinstance(data, bytes) else data)
+
+# Function to create an empty temporary file for a downloaded blob and return its path
+def spill_path(name_file):
+    extension = os.path.splitext(name_file)[1]
+    descriptor, path = tempfile.mkstemp(prefix="genfile_", suffix=extension, dir=spill_dir)
+    os.close(descriptor)
+    return path
@@ -0,0 +1,247 @@
+import csv
+import os
+import shutil
+import subprocess
+import tempfile
+import threading  # Import threading module
+import time
+import config  # Loads .env once for every module
+import dbengine  # Shared, pooled database engine
+from sqlalchemy import types as sqltypes
+
+# Bulk-load settings (override in .env)
+executemany_chunksize = int(os.getenv("BULK_CHUNKSIZE", "10000"))  # Rows per fast_executemany batch
+multi_values_max_rows = int(os.getenv("BULK_MULTI_MAX_ROWS", "2000"))  # Tables up to this size use multi-row VALUES
+bcp_min_rows = int(os.getenv("BULK_BCP_MIN_ROWS", "200000"))  # Tables from this size use bcp when available
+forced_strategy = os.getenv("BULK_LOAD_STRATEGY", "").strip().lower()  # Force one strategy by name
+tablock = os.getenv("BULK_TABLOCK", "1") != "0"  # Insert WITH (TABLOCK) on MSSQL, as bcp does with -h TABLOCK
+bcp_trusted = os.getenv("BULK_BCP_TRUSTED", "0") != "0"  # bcp logs in with Windows authentication (-T) instead of DB_USERNAME
+
+# MSSQL accepts at most 2100 parameters and 1000 rows per INSERT ... VALUES statement
+MSSQL_MAX_PARAMS = 2100
+MSSQL_MAX_VALUES_ROWS = 1000
+
+# Field and row terminators for bcp staging files (ASCII unit/record separators)
+BCP_FIELD_TERMINATOR = "\x1f"
+BCP_ROW_TERMINATOR = "\x1e"
+
+# Rows and seconds loaded by each strategy in this process
+_stats_lock = threading.Lock()
+_stats = {}
+
+# Function to convert a column type name from coltypes ("int", "decimal(10,2)", "nvarchar(50)", ...) to a SQLAlchemy type
+def sql_type(spec):
+    if spec == "smallint":
+        return sqltypes.SmallInteger()
+    elif spec == "int":
+        return sqltypes.Integer()
+    elif spec == "bigint":
+        return sqltypes.BigInteger()
+    elif spec.startswith("decimal("):
+        precision, scale = (int(part) for part in spec[8:-1].split(","))
+        return sqltypes.DECIMAL(precision, scale)
+    elif spec == "float":
+        return sqltypes.Float()
+    elif spec == "date":
+        return sqltypes.Date()
+    elif spec == "datetime":
+        return sqltypes.DateTime()
+    elif spec == "nvarchar(max)":
+        return sqltypes.NVARCHAR()
+    elif spec.startswith("nvarchar("):
+        return sqltypes.NVARCHAR(int(spec[9:-1]))
+    raise ValueError(f"Unknown column type: {spec}")
+
+# Function to insert one to_sql chunk WITH (TABLOCK): one table lock instead of row and page locks
+# Used as the to_sql method on MSSQL; multi writes the chunk as one multi-row VALUES statement, otherwise executemany
+def insert_tablock(multi):
+    def insert(table, connection, keys, data_iter):
+        name = f"[{table.schema}].[{table.name}]" if table.schema else f"[{table.name}]"
+        columns = ", ".join(f"[{key}]" for key in keys)
+        row_params = f"({', '.join('?' for _ in keys)})"
+        rows = list(data_iter)
+        if multi:
+            connection.exec_driver_sql(f"INSERT INTO {name} WITH (TABLOCK) ({columns}) VALUES {', '.join([row_params] * len(rows))}", tuple(value for row in rows for value in row))
+        else:
+            connection.exec_driver_sql(f"INSERT INTO {name} WITH (TABLOCK) ({columns}) VALUES {row_params}", rows)
+        return len(rows)
+    return insert
+
+# Function to pick the to_sql method: a TABLOCK insert on MSSQL (see BULK_TABLOCK), pandas' own otherwise
+def insert_method(connection, multi):
+    if tablock and connection.dialect.name == "mssql":
+        return insert_tablock(multi)
+    return "multi" if multi else None
+
+# Function to load with executemany (pyodbc fast_executemany is enabled on the shared engine)
+def load_executemany(df, table_name, connection, if_exists, dtype=None):
+    df.to_sql(table_name, con=connection, if_exists=if_exists, index=False, chunksize=executemany_chunksize, method=insert_method(connection, False), dtype=dtype)
+    connection.commit()
+
+# Function to load with multi-row INSERT ... VALUES statements
+def load_multi_values(df, table_name, connection, if_exists, dtype=None):
+    columns = max(len(df.columns), 1)
+    chunksize = min(MSSQL_MAX_VALUES_ROWS, (MSSQL_MAX_PARAMS - 1) // columns)
+    df.to_sql(table_name, con=connection, if_exists=if_exists, index=False, chunksize=max(chunksize, 1), method=insert_method(connection, True), dtype=dtype)
+    connection.commit()
+
+# Function to check whether the bcp utility can be used for this connection
+def bcp_available(connection):
+    return connection.dialect.name == "mssql" and shutil.which("bcp") is not None
+
+# Function to load by writing a CSV staging file and bulk-inserting it with the bcp utility
+def load_bcp(df, table_name, connection, if_exists, dtype=None):
+    # Create the (empty) target table with pandas' (or the typed load's) column types and commit so bcp can see it
+    df.head(0).to_sql(table_name, con=connection, if_exists=if_exists, index=False, dtype=dtype)
+    connection.commit()
+
+    staging_fd, staging_path = tempfile.mkstemp(suffix=".bcp")
+    os.close(staging_fd)
+    try:
+        # bcp converts text with SQL Server's rules: dates without a time, date-times with at most milliseconds
+        formats = {sqltypes.Date: "%Y-%m-%d", sqltypes.DateTime: "%Y-%m-%d %H:%M:%S.%f"}
+        staged = {column: df[column].dt.strftime(formats[type(column_type)]).str[:23] for column, column_type in (dtype or {}).items() if type(column_type) in formats}
+        if staged:
+            df = df.assign(**staged)
+        df.to_csv(staging_path, sep=BCP_FIELD_TERMINATOR, lineterminator=BCP_ROW_TERMINATOR, header=False, index=False, quoting=csv.QUOTE_NONE, encoding="utf-8")
+        command = [
+            "bcp", f"[{dbengine.database}].[dbo].[{table_name}]", "in", staging_path,
+            "-S", dbengine.server, "-c", "-C", "65001",
+            "-t", "0x1f", "-r", "0x1e",
+            "-b", str(executemany_chunksize), "-h", "TABLOCK",
+        ]
+        if bcp_trusted or not dbengine.username:
+            command += ["-T"]  # Trusted (Windows) authentication
+        else:
+            # bcp takes the password only as -P, so other users of this machine can read it in the process list
+            # while bcp runs; set BULK_BCP_TRUSTED=1 where the account running the loader can log in to SQL Server
+            command += ["-U", dbengine.username, "-P", dbengine.password or ""]
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"bcp failed for table '{table_name}': {result.stdout.strip()} {result.stderr.strip()}")
+    finally:
+        os.remove(staging_path)
+
+# Registered strategies: name -> (load function, availability check)
+STRATEGIES = {
+    "executemany": (load_executemany, lambda connection: True),
+    "multi_values": (load_multi_values, lambda connection: True),
+    "bcp": (load_bcp, bcp_available),
+}
+
+# Function to register an additional bulk-load strategy
+def register_strategy(name, load_function, available=lambda connection: True):
+    STRATEGIES[name] = (load_function, available)
+
+# Function to pick the fastest available strategy for a table of the given size
+def choose_strategy(row_count, connection):
+    if forced_strategy:
+        return forced_strategy
+    if row_count >= bcp_min_rows and STRATEGIES["bcp"][1](connection):
+        return "bcp"
+    if row_count <= multi_values_max_rows:
+        return "multi_values"
+    return "executemany"
+
+# Function to load a DataFrame into a table and return its throughput stats
+# Uses a pooled connection unless one is passed in (e.g. a local SQLite connection for testing).
+# Column types set by a typed load (df.attrs["sql_types"], see coltypes) are used to create the table.
+def load_dataframe(df, table_name, if_exists="replace", strategy=None, connection=None):
+    if connection is None:
+        with dbengine.connect() as pooled_connection:
+            return load_dataframe(df, table_name, if_exists, strategy, pooled_connection)
+
+    strategy = strategy or choose_strategy(len(df), connection)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown bulk-load strategy: {strategy}")
+    load_function, available = STRATEGIES[strategy]
+    if not available(connection):
+        raise ValueError(f"Bulk-load strategy '{strategy}' is not available for this connection")
+
+    start = time.perf_counter()
+    column_types = df.attrs.get("sql_types")
+    if column_types:
+        load_function(df, table_name, connection, if_exists, dtype={column: sql_type(spec) for column, spec in column_types.items()})
+    else:
+        load_function(df, table_name, connection, if_exists)
+    seconds = time.perf_counter() - start
+
+    rows = len(df)
+    with _stats_lock:
+        totals = _stats.setdefault(strategy, {"loads": 0, "rows": 0, "seconds": 0.0})
+        totals["loads"] += 1
+        totals["rows"] += rows
+        totals["seconds"] += seconds
+    return {
+        "table": table_name,
+        "strategy": strategy,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+    }
+
+# Function to build the MERGE that applies a staging table to its target table
+# Key columns match NULL to NULL; rows of the staging table without a match are inserted.
+def merge_sql(table_name, stage_name, keys, columns):
+    match = " AND ".join(f"(target.[{key}] = source.[{key}] OR (target.[{key}] IS NULL AND source.[{key}] IS NULL))" for key in keys)
+    updates = ", ".join(f"target.[{column}] = source.[{column}]" for column in columns if column not in keys)
+    column_list = ", ".join(f"[{column}]" for column in columns)
+    source_list = ", ".join(f"source.[{column}]" for column in columns)
+    sql = f"MERGE [dbo].[{table_name}] WITH (TABLOCK) AS target USING [dbo].[{stage_name}] AS source ON {match}"
+    if updates:
+        sql += f" WHEN MATCHED THEN UPDATE SET {updates}"
+    sql += f" WHEN NOT MATCHED BY TARGET THEN INSERT ({column_list}) VALUES ({source_list});"
+    return sql
+
+# Function to merge a DataFrame into a table on its key columns and return its throughput stats
+# The rows are bulk-loaded into <table>__stage with the usual strategies, then one MERGE updates the
+# rows whose keys match and inserts the others; a missing target table is created by renaming the staging table.
+def merge_dataframe(df, table_name, keys, strategy=None, connection=None):
+    if connection is None:
+        with dbengine.connect() as pooled_connection:
+            return merge_dataframe(df, table_name, keys, strategy, pooled_connection)
+
+    missing = [key for key in keys if key not in df.columns]
+    if not keys or missing:
+        raise ValueError(f"Merge into '{table_name}' needs key columns that exist in the data (missing: {', '.join(missing) or 'xKeyColumns'})")
+    if connection.dialect.name != "mssql":
+        raise ValueError("Merge loads need SQL Server")
+
+    # MERGE fails when two source rows match the same target row, so the last row of each key wins
+    deduplicated = df.drop_duplicates(subset=keys, keep="last")
+    deduplicated.attrs.update(df.attrs)
+    stage_name = f"{table_name}__stage"
+    stats = load_dataframe(deduplicated, stage_name, if_exists="replace", strategy=strategy, connection=connection)
+
+    start = time.perf_counter()
+    if connection.dialect.has_table(connection, table_name, schema="dbo"):
+        connection.exec_driver_sql(merge_sql(table_name, stage_name, keys, list(deduplicated.columns)))
+        connection.exec_driver_sql(f"DROP TABLE [dbo].[{stage_name}]")
+    else:
+        connection.exec_driver_sql(f"EXEC sp_rename N'dbo.{stage_name}', N'{table_name}'")
+    connection.commit()
+    stats["table"] = table_name
+    stats["seconds"] += time.perf_counter() - start
+    stats["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return stats
+
+# Function to return rows/s per strategy for everything loaded so far
+def strategy_stats():
+    with _stats_lock:
+        stats = {name: dict(totals) for name, totals in _stats.items()}
+    for totals in stats.values():
+        totals["rows_per_sec"] = totals["rows"] / totals["seconds"] if totals["seconds"] > 0 else 0.0
+    return stats
+
+# Function to clear the per-strategy stats (e.g. at the start of a Gen File run)
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+# Function to format per-strategy throughput for display
+def format_stats(stats=None):
+    stats = strategy_stats() if stats is None else stats
+    return "\n".join(
+        f"{name}: {totals['rows']:,} rows in {totals['loads']} loads, {totals['rows_per_sec']:,.0f} rows/s"
+        for name, totals in sorted(stats.items())
+    )
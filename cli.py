@@ -0,0 +1,102 @@
+import argparse
+import glob
+import json
+import multiprocessing  # Gen File parses on a process pool
+import os
+import sys
+import time
+import config  # Loads .env once for every module
+import bulkload  # Bulk-load strategies for DataFrames
+import dbengine  # Shared, pooled database engine
+import filestore  # tblFile storage operations
+import genfile  # Parallel Gen File pipeline
+import instrument  # Per-stage timings and round-trip counts
+
+# Headless entry point for scheduled loads: no tkinter is imported here or by the modules above.
+# Example: python cli.py --job "Sales" "D:\exports\*.csv"
+# Prints one JSON document with per-file results and Gen File stats to stdout.
+
+# Exit codes
+EXIT_OK = 0
+EXIT_PROBLEMS = 1  # Some file failed to import or load
+EXIT_FAILED = 2  # Nothing could be run (bad arguments, no files, database unreachable)
+
+# Function to expand globs and directories into a sorted list of files
+def expand_paths(paths):
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            files.update(os.path.join(path, name) for name in os.listdir(path))
+        else:
+            files.update(glob.glob(path, recursive=True))
+    return sorted(file_path for file_path in files if os.path.isfile(file_path))
+
+# Function to parse the command line
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import files into tblFile and run Gen File without the GUI.")
+    parser.add_argument("paths", nargs="*", help="Files, glob patterns or directories to import")
+    parser.add_argument("--job", help="Job name (xNameJob in tblFileJob, as listed by spFileJob 'showFile')")
+    parser.add_argument("--no-gen-file", action="store_true", help="Only import the files; do not run Gen File")
+    parser.add_argument("--dbwh", default=config.dbwh, help="Database warehouse identifier used in table names (default: DB_WH)")
+    parser.add_argument("--import-workers", type=int, default=filestore.import_workers, help="Files uploaded at the same time (default: IMPORT_WORKERS)")
+    parser.add_argument("--parse-workers", type=int, default=genfile.parse_workers, help="Gen File parse processes (default: GENFILE_PARSE_WORKERS)")
+    parser.add_argument("--load-workers", type=int, default=genfile.load_workers, help="Gen File load threads (default: GENFILE_LOAD_WORKERS)")
+    parser.add_argument("--indent", type=int, default=None, help="Indent the JSON output")
+    args = parser.parse_args(argv)
+    if args.paths and not args.job:
+        parser.error("--job is required when files are given")
+    if not args.paths and args.no_gen_file:
+        parser.error("nothing to do: give files to import or drop --no-gen-file")
+    return args
+
+# Function to run an import and/or Gen File and return (exit code, stats dict)
+# With PROFILE_MODE set the whole run is captured (see instrument.profile)
+def run(args):
+    with instrument.profile("cli"):
+        return run_steps(args)
+
+# Function to run the import and Gen File steps of run()
+def run_steps(args):
+    stats = {"job": args.job, "imported": [], "gen_file": None, "problems": []}
+    start = time.perf_counter()
+    instrument.reset()
+
+    if args.paths:
+        file_paths = expand_paths(args.paths)
+        if not file_paths:
+            stats["problems"].append({"level": "error", "title": "No Files", "message": f"No files match: {' '.join(args.paths)}"})
+            return EXIT_FAILED, stats
+        stats["imported"] = filestore.import_files(file_paths, args.job, workers=args.import_workers)
+
+    if not args.no_gen_file:
+        def report(level, title, message):
+            stats["problems"].append({"level": level, "title": title, "message": message})
+
+        bulkload.reset_stats()
+        stats["gen_file"] = genfile.run_gen_file(args.dbwh, report=report, parse_workers=args.parse_workers, load_workers=args.load_workers)
+        stats["bulk_load"] = bulkload.strategy_stats()
+
+    stats["stages"] = instrument.stage_totals()
+    stats["pool"] = dbengine.pool_stats()
+    stats["seconds"] = time.perf_counter() - start
+
+    # Duplicates are expected when a scheduled run sees the same export again; the rest are failures
+    failed_imports = [result for result in stats["imported"] if not filestore.import_succeeded(result)]
+    failed_loads = [problem for problem in stats["problems"] if problem["level"] == "error"]
+    return (EXIT_PROBLEMS if failed_imports or failed_loads else EXIT_OK), stats
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        exit_code, stats = run(args)
+    except Exception as e:
+        exit_code, stats = EXIT_FAILED, {"problems": [{"level": "error", "title": "Error", "message": str(e)}]}
+    stats["exit_code"] = exit_code
+    json.dump(stats, sys.stdout, indent=args.indent, default=str)
+    sys.stdout.write("\n")
+    return exit_code
+
+if __name__ == "__main__":
+    # Let frozen (PyInstaller) Gen File worker processes start without running the command again
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import datetime
+import decimal
+import re
+import pandas as pd
+
+# Column types for typed loads, written as SQL Server type names:
+# "smallint", "int", "bigint", "decimal(p,s)", "float", "date", "datetime", "nvarchar(n)", "nvarchar(max)".
+# The same names are used in the optional per-job schema (tblFileJob.xSchema, see sql/004_tblFileJob_schema.sql).
+
+# Text lengths are rounded up to one of these sizes, leaving room for longer values in later batches
+NVARCHAR_SIZES = (10, 20, 50, 100, 255, 500, 1000, 2000, 4000)
+
+# Integer types by range
+INT_RANGES = (
+    ("smallint", -2 ** 15, 2 ** 15 - 1, "Int16"),
+    ("int", -2 ** 31, 2 ** 31 - 1, "Int32"),
+    ("bigint", -2 ** 63, 2 ** 63 - 1, "Int64"),
+)
+
+# Numbers kept as text: leading zeros (codes, IDs), signs other than "-", thousand separators, exponents
+NUMBER_TEXT = re.compile(r"^-?(0|[1-9]\d*)(\.\d+)?$")
+# ISO dates and date-times only; day/month order of other formats cannot be told from the data
+DATE_TEXT = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+DATETIME_TEXT = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?$")
+
+# Error raised when a value does not fit the type chosen for its column
+class ColumnTypeError(ValueError):
+    pass
+
+# Function to round a text length up to an NVARCHAR size with room for longer values
+def nvarchar_spec(max_length):
+    for size in NVARCHAR_SIZES:
+        if max_length * 2 <= size:
+            return f"nvarchar({size})"
+    return "nvarchar(max)"
+
+# Function to pick the type of one column from its non-empty values
+def infer_column(values):
+    if not values:
+        return "nvarchar(10)"
+    kinds = {type(value) for value in values}
+
+    # Values already typed by the reader (xlsx cells, pandas-parsed CSV)
+    if kinds <= {int, bool} and bool not in kinds:
+        return int_spec(min(values), max(values))
+    if kinds <= {int, float}:
+        if all(float(value).is_integer() for value in values) and max(abs(value) for value in values) < 2 ** 53:
+            return int_spec(int(min(values)), int(max(values)))  # Whole numbers read as float because of empty cells
+        return "float"
+    if kinds <= {datetime.datetime, datetime.date, pd.Timestamp}:
+        if all(getattr(value, "hour", 0) == 0 and getattr(value, "minute", 0) == 0 and getattr(value, "second", 0) == 0 and getattr(value, "microsecond", 0) == 0 for value in values):
+            return "date"
+        return "datetime"
+
+    texts = [value if isinstance(value, str) else str(value) for value in values]
+    if all(NUMBER_TEXT.match(text) for text in texts):
+        if all("." not in text for text in texts):
+            if max(len(text) for text in texts) <= 18:
+                return int_spec(min(int(text) for text in texts), max(int(text) for text in texts))
+        else:
+            scale = max(len(text.split(".")[1]) if "." in text else 0 for text in texts)
+            integer_digits = max(len(text.lstrip("-").split(".")[0]) for text in texts)
+            precision = integer_digits + 2 + scale  # Two more integer digits for later batches
+            if scale <= 10 and precision <= 38:
+                return f"decimal({precision},{scale})"
+            return "float"
+    if all(DATE_TEXT.match(text) for text in texts):
+        return "date"
+    if all(DATE_TEXT.match(text) or DATETIME_TEXT.match(text) for text in texts):
+        return "datetime"
+    return nvarchar_spec(max(len(text) for text in texts))
+
+# Function to pick the smallest integer type for a range, leaving room for values outside the sample
+def int_spec(low, high):
+    for spec, type_low, type_high, _ in INT_RANGES:
+        if type_low <= low * 2 and high * 2 <= type_high:
+            return spec
+    return "bigint"
+
+# Function to infer every column's type from the first sample_rows rows
+def infer_types(df, sample_rows=10000):
+    sample = df.head(sample_rows)
+    types = {}
+    for column in df.columns:
+        values = [value for value in sample[column].tolist() if not is_empty(value)]
+        types[column] = infer_column(values)
+    return types
+
+# Function to tell empty cells (None, NaN, NaT, "") apart from values
+def is_empty(value):
+    return value is None or value == "" or (not isinstance(value, str) and pd.isna(value))
+
+# Function to convert one value to a Decimal that fits decimal(precision,scale) exactly, or None when it does not
+# Decimal keeps every digit (float64 keeps about 16) and a value with more decimals than scale is not rounded
+def decimal_value(value, precision, scale):
+    try:
+        number = decimal.Decimal(value if isinstance(value, str) else str(value))
+    except (decimal.InvalidOperation, ValueError):
+        return None
+    if not number.is_finite():
+        return None
+    digits, exponent = number.normalize().as_tuple()[1:]
+    decimals = max(-exponent, 0)
+    integer_digits = max(len(digits) + exponent, 0)
+    if decimals > scale or integer_digits > precision - scale:
+        return None
+    return number
+
+# Function to convert one column to its type; raises ColumnTypeError when a value does not fit
+def convert_column(series, spec):
+    empty = series.map(is_empty)
+    if spec in ("smallint", "int", "bigint"):
+        dtype = next(pandas_dtype for name, _, _, pandas_dtype in INT_RANGES if name == spec)
+        converted = pd.to_numeric(series.where(~empty), errors="coerce")
+        if (converted.notna() | empty).all() and (converted.dropna() % 1 == 0).all():
+            low, high = next((low, high) for name, low, high, _ in INT_RANGES if name == spec)
+            if converted.dropna().between(low, high).all():
+                return converted.astype(dtype)
+    elif spec.startswith("decimal"):
+        precision, scale = (int(part) for part in spec[8:-1].split(","))
+        converted = series.map(lambda value: None if is_empty(value) else decimal_value(value, precision, scale))
+        if (converted.notna() | empty).all():
+            return converted.astype(object)
+    elif spec == "float":
+        converted = pd.to_numeric(series.where(~empty), errors="coerce")
+        if (converted.notna() | empty).all():
+            return converted.astype("float64")
+    elif spec in ("date", "datetime"):
+        converted = pd.to_datetime(series.where(~empty), errors="coerce", format="ISO8601")
+        if (converted.notna() | empty).all():
+            return converted.dt.normalize() if spec == "date" else converted
+    elif spec.startswith("nvarchar"):
+        converted = series.map(lambda value: None if is_empty(value) else str(value))
+        if spec == "nvarchar(max)" or converted.dropna().str.len().le(int(spec[9:-1])).all():
+            return converted.astype(object)
+    else:
+        raise ColumnTypeError(f"unknown column type '{spec}'")
+    raise ColumnTypeError(f"column {series.name} has values that do not fit {spec}")
+
+# Function to type a DataFrame for loading
+# types maps column -> spec and fixes those columns (a later batch of a table, or a per-job schema);
+# the other columns are inferred from a sample and widened to the whole frame when a value does not fit.
+# Returns (typed DataFrame, {column: spec})
+def apply_types(df, types=None, sample_rows=10000):
+    types = dict(types or {})
+    inferred = infer_types(df[[column for column in df.columns if column not in types]], sample_rows)
+    typed = {}
+    for column in df.columns:
+        if column in types:
+            typed[column] = convert_column(df[column], types[column])
+            continue
+        spec = inferred[column]
+        try:
+            typed[column] = convert_column(df[column], spec)
+        except ColumnTypeError:
+            # A value outside the sample does not fit: infer from every row instead
+            spec = infer_column([value for value in df[column].tolist() if not is_empty(value)])
+            try:
+                typed[column] = convert_column(df[column], spec)
+            except ColumnTypeError:
+                spec = nvarchar_spec(int(df[column].map(lambda value: 0 if is_empty(value) else len(str(value))).max() or 1))
+                typed[column] = convert_column(df[column], spec)
+        types[column] = spec
+    result = pd.DataFrame(typed, index=df.index)
+    result.attrs.update(df.attrs)
+    return result, {column: types[column] for column in df.columns}
@@ -0,0 +1,8 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file, once for every module (import this before reading os.getenv)
+load_dotenv()
+
+# Database warehouse identifier shown in window titles and used in Gen File table names
+dbwh = os.getenv("DB_WH")
@@ -0,0 +1,127 @@
+import numpy as np
+
+# Delimiter and encoding detection for CSV blobs, run before the file is parsed.
+# A few regions of the blob are sampled; for each candidate delimiter the fields of every sampled line
+# are counted at once with numpy (quoted text excluded), and the delimiter whose field count is the same
+# on the most lines wins. The encoding comes from one scan of the same bytes.
+# Short or ragged lines are fine (pandas fills them with NULL); a file that pandas would stop on, with a line
+# longer than the first, is rejected here rather than after a slow parse and load.
+
+# Candidate delimiters with the table name prefix of each; the first wins a tie (pipe, as before)
+DELIMITERS = {"|": "Pipe", ",": "Comma", ";": "Semicolon", "\t": "Tab"}
+
+SAMPLE_REGIONS = 4  # Regions sampled: the start, the end and evenly spaced ones between
+SAMPLE_BYTES = 16 * 1024  # Bytes per region
+
+DEFAULT_ENCODING = "iso8859_11"  # TIS-620; also used for files that are plain ASCII
+UTF8_BOM = b"\xef\xbb\xbf"
+
+# Bytes with no character in TIS-620 (iso8859_11) and Windows-874 (cp874)
+TIS620_UNDEFINED = list(range(0xDB, 0xDF)) + list(range(0xFC, 0x100))
+CP874_ONLY = [0x80, 0x85] + list(range(0x91, 0x98))  # Windows-874 additions in the C1 range (€, …, quotes, dashes)
+C1_RANGE = range(0x80, 0xA0)
+
+QUOTE = ord('"')
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+
+# Error raised when a CSV blob cannot be read safely; title is the message box title
+class CsvSniffError(Exception):
+    def __init__(self, title, message):
+        super().__init__(title, message)  # Keep every argument so it pickles back from a worker process
+        self.title = title
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+# Function to cut the sampled regions out of a buffer (the whole buffer when it is small)
+# Regions after the first start at a line start and every region but the last ends at a line end.
+def sample_regions(view):
+    size = len(view)
+    if size <= SAMPLE_REGIONS * SAMPLE_BYTES:
+        return [bytes(view)]
+    regions = []
+    for k in range(SAMPLE_REGIONS):
+        start = (size - SAMPLE_BYTES) * k // (SAMPLE_REGIONS - 1)
+        region = bytes(view[start:start + SAMPLE_BYTES])
+        if start > 0:
+            region = region[region.find(b"\n") + 1:]
+        if start + SAMPLE_BYTES < size:
+            region = region[:region.rfind(b"\n") + 1]
+        regions.append(region)
+    return regions
+
+# Function to count the delimiters on each non-blank line of a region
+# Returns {delimiter: numpy array with one count per line}
+def line_counts(region):
+    data = np.frombuffer(region, dtype=np.uint8)
+    outside = np.cumsum(data == QUOTE) % 2 == 0  # Outside quoted text ("" inside quotes toggles twice)
+    ends = np.flatnonzero((data == NEWLINE) & outside)
+    if len(data) and data[-1] != NEWLINE:
+        ends = np.append(ends, len(data))  # Last line without a newline
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts
+    lengths = lengths - ((lengths > 0) & (data[np.maximum(ends - 1, 0)] == CARRIAGE_RETURN))
+    filled = lengths > 0  # Blank lines are skipped by pandas too
+    counts = {}
+    for delimiter in DELIMITERS:
+        before = np.concatenate(([0], np.cumsum((data == ord(delimiter)) & outside)))
+        counts[delimiter] = (before[ends] - before[starts])[filled]
+    return counts
+
+# Function to score a delimiter: (share of lines with its most common count, most common count, highest count)
+def score(counts):
+    if not len(counts):
+        return 0.0, 0, 0
+    values, frequencies = np.unique(counts, return_counts=True)
+    return frequencies.max() / len(counts), int(values[frequencies.argmax()]), int(values.max())
+
+# Function to detect the encoding of the sampled bytes; None when they are plain ASCII
+def detect_encoding(regions):
+    if regions[0].startswith(UTF8_BOM):
+        return "utf-8-sig"
+    histogram = np.zeros(256, dtype=np.int64)
+    for region in regions:
+        histogram += np.bincount(np.frombuffer(region, dtype=np.uint8), minlength=256)
+    if not histogram[0x80:].any():
+        return None
+    try:
+        for region in regions:
+            region.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    c1_bytes = [byte for byte in C1_RANGE if histogram[byte]]
+    if histogram[TIS620_UNDEFINED].any() or any(byte not in CP874_ONLY for byte in c1_bytes):
+        raise CsvSniffError("Encoding Error", "the file is neither UTF-8 nor TIS-620 (Thai) text")
+    return "cp874" if c1_bytes else DEFAULT_ENCODING
+
+# Function to detect the delimiter and encoding of a CSV buffer (bytes, memoryview or mmap)
+# Ties between delimiters go to the first in DELIMITERS; a plain ASCII sample gets DEFAULT_ENCODING.
+# Returns (delimiter, encoding); raises CsvSniffError when no delimiter splits most lines
+# or when a sampled line has more fields than the first line (pandas would stop there).
+def sniff(view):
+    regions = sample_regions(view)
+
+    counts = {delimiter: [] for delimiter in DELIMITERS}
+    for region in regions:
+        for delimiter, region_counts in line_counts(region).items():
+            counts[delimiter].append(region_counts)
+    scores = {delimiter: score(np.concatenate(parts)) for delimiter, parts in counts.items()}
+    present = [delimiter for delimiter in DELIMITERS if scores[delimiter][2] > 0]
+    if not present:
+        raise CsvSniffError("Delimiter Error", "no delimiter found (tried | , ; and tab)")
+    candidates = [delimiter for delimiter in present if scores[delimiter][1] > 0] or present  # Delimiters found on most lines
+    best = max(scores[delimiter][0] for delimiter in candidates)
+    tied = [delimiter for delimiter in candidates if scores[delimiter][0] == best]
+    delimiter = tied[0]
+
+    _, usual, highest = scores[delimiter]
+    if usual == 0:
+        raise CsvSniffError("Delimiter Error", "lines use different delimiters (tried | , ; and tab)")
+    first = counts[delimiter][0][:1]
+    if len(first) and highest > first[0]:
+        raise CsvSniffError("Delimiter Error", f"a line has {highest + 1} fields but the first line has {int(first[0]) + 1}")
+
+    return delimiter, detect_encoding(regions) or DEFAULT_ENCODING
@@ -0,0 +1,131 @@
+import os
+import threading  # Import threading module
+import time
+from contextlib import contextmanager
+from urllib.parse import quote_plus
+from sqlalchemy import create_engine, event
+import config  # Loads .env once for every module
+import instrument  # Per-stage timings and round-trip counts
+
+# Retrieve database values from environment variables
+server = os.getenv("DB_SERVER")
+database = os.getenv("DB_DATABASE")
+username = os.getenv("DB_USERNAME")
+password = os.getenv("DB_PASSWORD")
+driver = os.getenv("DB_DRIVER")
+
+# Connection pool settings (override in .env)
+pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+pool_timeout = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+pool_recycle = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds before a connection is replaced
+
+# The single engine shared by login, mainmenu and importfile
+_engine = None
+_engine_lock = threading.Lock()
+
+# Pool checkout/wait statistics
+_stats_lock = threading.Lock()
+_stats = {
+    "connects": 0,      # New DBAPI connections opened (TCP + login handshakes)
+    "checkouts": 0,     # Connections handed out by the pool
+    "checkins": 0,      # Connections returned to the pool
+    "statements": 0,    # SQL statements sent (round trips; an executemany counts once)
+    "wait_total": 0.0,  # Total seconds spent waiting for a connection
+    "wait_max": 0.0,    # Longest single wait in seconds
+}
+
+# Function to build the connection URL from the environment
+def build_connection_url():
+    odbc_connect = f"DRIVER={driver};SERVER={server};DATABASE={database};UID={username};PWD={password}"
+    return f"mssql+pyodbc:///?odbc_connect={quote_plus(odbc_connect)}"
+
+# Function to count pool events
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+# Function to count one statement and charge it to the stage running on this thread (see instrument)
+def _count_statement(connection, cursor, statement, parameters, context, executemany):
+    _count("statements")
+    instrument.round_trip()
+
+# Function to create the engine (or use the one passed in) and attach pool and statement statistics
+def init_engine(engine=None):
+    global _engine
+    with _engine_lock:
+        if _engine is not None and engine is None:
+            return _engine
+        if engine is None:
+            engine = create_engine(
+                build_connection_url(),
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=pool_timeout,
+                pool_recycle=pool_recycle,
+                pool_pre_ping=True,
+                fast_executemany=True,
+            )
+        event.listen(engine, "connect", lambda dbapi_conn, record: _count("connects"))
+        event.listen(engine, "checkout", lambda dbapi_conn, record, proxy: _count("checkouts"))
+        event.listen(engine, "checkin", lambda dbapi_conn, record: _count("checkins"))
+        event.listen(engine, "before_cursor_execute", _count_statement)
+        if _engine is not None:
+            _engine.dispose()
+        _engine = engine
+        return _engine
+
+# Function to get the shared engine, creating it on first use
+def get_engine():
+    engine = _engine
+    if engine is None:
+        engine = init_engine()
+    return engine
+
+# Function to check out a connection from the pool and record the wait time
+def connect():
+    engine = get_engine()
+    start = time.perf_counter()
+    connection = engine.connect()
+    waited = time.perf_counter() - start
+    with _stats_lock:
+        _stats["wait_total"] += waited
+        _stats["wait_max"] = max(_stats["wait_max"], waited)
+    return connection
+
+# Function to run a block inside one transaction on one pooled connection
+@contextmanager
+def begin():
+    with connect() as connection:
+        with connection.begin():
+            yield connection
+
+# Function to return the pool statistics
+def pool_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["wait_avg"] = stats["wait_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+    engine = _engine
+    if engine is not None:
+        pool = engine.pool
+        stats["pool_status"] = pool.status()
+        stats["checked_out"] = pool.checkedout() if hasattr(pool, "checkedout") else None
+    return stats
+
+# Function to build the engine and open the first pooled connection, so the first query does not wait for it
+# Errors are ignored here; the first real query reports them
+def warm_up():
+    try:
+        with connect():
+            pass
+        return True
+    except Exception:
+        return False
+
+# Function to close every pooled connection (e.g. on exit)
+def dispose_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
@@ -0,0 +1,409 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError
+import config  # Loads .env once for every module
+import blobcache  # Local copies of imported files for Gen File
+import blobstore  # In-memory or spilled blobs for Gen File
+import dbengine  # Shared, pooled database engine
+import instrument  # Per-stage timings and round-trip counts
+import jobcache  # Cached tblFileJob metadata
+
+# Import statuses returned by import_file
+STATUS_INSERTED = "inserted"
+STATUS_REPLACED = "replaced"  # A file with the same name but different content was replaced
+STATUS_DUPLICATE = "duplicate"
+STATUS_TYPE_MISMATCH = "type_mismatch"
+STATUS_INVALID_JOB = "invalid_job"
+STATUS_RESUME = "resume"  # Internal: an interrupted chunked upload of the same file exists
+
+# tblFileLoad.FileIndex of files appended or merged into a table: their position in tblFile does not matter
+APPENDED_INDEX = -1
+
+# Files at least this large are streamed to binDataFile in chunks (override in .env)
+stream_threshold = int(float(os.getenv("FILE_STREAM_THRESHOLD_MB", "64")) * 1024 * 1024)
+chunk_size = int(float(os.getenv("FILE_UPLOAD_CHUNK_MB", "4")) * 1024 * 1024)
+import_workers = int(os.getenv("IMPORT_WORKERS", "4"))  # Files uploaded at the same time in a multi-file import
+page_size = int(os.getenv("TABLE_PAGE_SIZE", "200"))  # Rows shown per page of the Import window table
+
+# One batch: drop temp tables, validate the job's file type and insert the file.
+# Duplicate content is found through the index on HashFile (sql/003_tblFile_hashfile.sql); a file with
+# the same name but new content replaces the old row. The unique index on NameFile
+# (sql/001_tblFile_unique_namefile.sql) still rejects a concurrent insert of the same name.
+# For chunked uploads :data is empty and an unfinished row with the same name and hash is resumed.
+# :data appears once: pyodbc binds a parameter per use, so its length comes in as :data_length.
+IMPORT_FILE_SQL = """
+SET NOCOUNT ON;
+{drop_temp}
+DECLARE @xFile NVARCHAR(50) = (SELECT TOP 1 xFile FROM [dbo].[tblFileJob] WHERE xNameJob = :namejob);
+IF @xFile IS NULL
+    SELECT :invalid_job AS Status, NULL AS xFile, NULL AS Offset, NULL AS ExistingName;
+ELSE IF LOWER(:type) <> '.' + LOWER(@xFile)
+    SELECT :type_mismatch AS Status, @xFile AS xFile, NULL AS Offset, NULL AS ExistingName;
+ELSE
+BEGIN
+    DECLARE @existing NVARCHAR(450), @offset BIGINT, @size BIGINT;
+    SELECT TOP 1 @existing = NameFile, @offset = DATALENGTH(binDataFile), @size = SizeFile
+    FROM [dbo].[tblFile] WITH (UPDLOCK, HOLDLOCK)
+    WHERE HashFile = :hash
+    ORDER BY CASE WHEN NameFile = :name THEN 0 ELSE 1 END;
+
+    IF @existing = :name AND @size = :size AND @offset < :size
+        SELECT :resume AS Status, @xFile AS xFile, @offset AS Offset, @existing AS ExistingName;
+    ELSE IF @existing IS NOT NULL
+        SELECT :duplicate AS Status, @xFile AS xFile, NULL AS Offset, @existing AS ExistingName;
+    ELSE
+    BEGIN
+        BEGIN TRY
+            DELETE FROM [dbo].[tblFile] WHERE NameFile = :name;
+            DECLARE @replaced INT = @@ROWCOUNT;
+            INSERT INTO [dbo].[tblFile] (NameJob, NameFile, TypeFile, binDataFile, SizeFile, HashFile)
+            VALUES (:namejob, :name, :type, :data, :size, :hash);
+            SELECT CASE WHEN @replaced > 0 THEN :replaced ELSE :inserted END AS Status, @xFile AS xFile, :data_length AS Offset, NULL AS ExistingName;
+        END TRY
+        BEGIN CATCH
+            IF ERROR_NUMBER() NOT IN (2601, 2627)
+                THROW;
+            SELECT :duplicate AS Status, @xFile AS xFile, NULL AS Offset, :name AS ExistingName;
+        END CATCH
+    END
+END
+"""
+
+# Append one chunk; the length check makes a retried or concurrent chunk a no-op
+APPEND_CHUNK_SQL = """
+UPDATE [dbo].[tblFile]
+SET binDataFile.WRITE(:chunk, NULL, NULL)
+WHERE NameFile = :name AND DATALENGTH(binDataFile) = :offset
+"""
+
+# Function to compute the SHA-256 of a file, reading it in chunks
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+# Function to validate, dedupe and insert a file in one round trip and one transaction
+# The file type is checked against the cached job list first, so a wrong file is rejected without reading it;
+# the batch repeats the check on the server in case the cache is stale.
+# Large files are inserted empty and then streamed in chunks; progress(done_bytes, total_bytes) is called per chunk
+# Returns (status, expected_file_type, existing_name) where existing_name is the file holding the same content
+def import_file(file_path, name_job, drop_temp=False, progress=None):
+    file_name = os.path.basename(file_path)
+    file_type = os.path.splitext(file_name)[1]
+
+    try:
+        expected_extension = jobcache.expected_extension(name_job)
+    except Exception:
+        expected_extension = ""  # Cache unavailable: leave the check to the server
+    if expected_extension is not None and expected_extension and file_type.lower() != expected_extension:
+        if drop_temp:
+            drop_temp_tables()
+        return STATUS_TYPE_MISMATCH, expected_extension[1:], None
+
+    file_size = os.path.getsize(file_path)
+
+    # Small files go in the same batch; large files are hashed first and sent by upload_chunks
+    with instrument.stage("hash", file_name, bytes=file_size):
+        if file_size < stream_threshold:
+            with open(file_path, "rb") as file:
+                binary_data = file.read()
+            file_hash = hashlib.sha256(binary_data).digest()
+        else:
+            binary_data = b""
+            file_hash = file_sha256(file_path)
+
+    # The batch (with spDropTableTemp when drop_temp is set) and any chunks count as the upload stage
+    sql_query = text(IMPORT_FILE_SQL.format(drop_temp="EXEC [dbo].[spDropTableTemp];" if drop_temp else ""))
+    with instrument.stage("upload", file_name, bytes=file_size):
+        with dbengine.begin() as connection:
+            status, expected_file_type, offset, existing_name = connection.execute(sql_query, {
+                "namejob": name_job,
+                "name": file_name,
+                "type": file_type,
+                "data": binary_data,
+                "data_length": len(binary_data),
+                "size": file_size,
+                "hash": file_hash,
+                "inserted": STATUS_INSERTED,
+                "replaced": STATUS_REPLACED,
+                "duplicate": STATUS_DUPLICATE,
+                "type_mismatch": STATUS_TYPE_MISMATCH,
+                "invalid_job": STATUS_INVALID_JOB,
+                "resume": STATUS_RESUME,
+            }).fetchone()
+        binary_data = None  # Release the in-memory copy before streaming
+
+        if status in (STATUS_INSERTED, STATUS_REPLACED, STATUS_RESUME):
+            if offset < file_size:
+                upload_chunks(file_path, file_name, offset, progress)
+            elif progress:
+                progress(file_size, file_size)
+        if status == STATUS_RESUME:
+            status = STATUS_INSERTED
+    if status in (STATUS_INSERTED, STATUS_REPLACED, STATUS_DUPLICATE):
+        cache_file(file_hash, file_path)
+    return status, expected_file_type, existing_name
+
+# Function to keep a local copy of a file that is in tblFile, so Gen File need not download it (see blobcache)
+# A copy that cannot be written is skipped: the cache must never fail an import
+def cache_file(file_hash, file_path):
+    try:
+        blobcache.put_file(file_hash, file_path)
+    except Exception:
+        pass
+
+# Function to describe an import_file result as (level, title, message), level being "info", "warning" or "error"
+def describe_status(status, file_path, name_job, expected_file_type=None, existing_name=None):
+    file_name = os.path.basename(file_path)
+    if status == STATUS_INSERTED:
+        return "info", "Success", "File inserted into the database successfully!"
+    elif status == STATUS_REPLACED:
+        return "info", "Success", "File with the same name replaced in the database successfully!"
+    elif status == STATUS_DUPLICATE:
+        if existing_name == file_name:
+            return "warning", "Duplicate File", f"A file with the name '{file_name}' already exists in the database."
+        return "warning", "Duplicate File", f"The content of '{file_name}' already exists in the database as '{existing_name}'."
+    elif status == STATUS_TYPE_MISMATCH:
+        actual_file_type = os.path.splitext(file_path)[1].lower()
+        return "warning", "File Type Mismatch", f"Expected file type: {expected_file_type}, but selected file type: {actual_file_type}"
+    return "warning", "Invalid Job", f"No file type found for job: {name_job}"
+
+# Function to drop the temporary tables left by the previous Gen File run
+def drop_temp_tables():
+    with instrument.stage("drop_temp"), dbengine.begin() as connection:
+        connection.execute(text("EXEC [dbo].[spDropTableTemp]"))
+
+# Function to import one file and describe the result as a dict with its status, message level/title/text, size and seconds
+def import_file_result(file_path, name_job, drop_temp=False, progress=None):
+    start = time.perf_counter()
+    try:
+        status, expected_file_type, existing_name = import_file(file_path, name_job, drop_temp=drop_temp, progress=progress)
+        level, title, message = describe_status(status, file_path, name_job, expected_file_type, existing_name)
+    except Exception as e:
+        status, level, title, message = "error", "error", "Error", f"Failed to insert file into the database: {e}"
+    try:
+        file_size = os.path.getsize(file_path)
+    except OSError:
+        file_size = 0
+    result = {
+        "file": file_path,
+        "status": status,
+        "level": level,
+        "title": title,
+        "message": message,
+        "bytes": file_size,
+        "seconds": time.perf_counter() - start,
+    }
+    instrument.log_file("import", os.path.basename(file_path), job=name_job, status=status, bytes=file_size, seconds=result["seconds"])
+    return result
+
+# Function to import a batch of files for one job, dropping temporary tables once before the first file
+# At most workers files are uploaded at a time. progress(file_path, done_bytes, total_bytes) is called as
+# each file uploads and on_result(result) as each finishes (both from worker threads).
+# Returns one result dict per file, in the order given
+def import_files(file_paths, name_job, drop_temp=True, workers=1, progress=None, on_result=None):
+    file_paths = list(file_paths)
+    if drop_temp and workers > 1 and len(file_paths) > 1:
+        drop_temp_tables()  # Once, before any upload starts
+        drop_temp = False
+
+    def run(position, file_path):
+        file_progress = (lambda done_bytes, total_bytes: progress(file_path, done_bytes, total_bytes)) if progress else None
+        with instrument.profile_thread():
+            result = import_file_result(file_path, name_job, drop_temp=drop_temp and position == 0, progress=file_progress)
+        if on_result:
+            on_result(result)
+        return result
+
+    if workers <= 1:
+        return [run(position, file_path) for position, file_path in enumerate(file_paths)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run, range(len(file_paths)), file_paths))
+
+# Function to tell whether an import result means the file is in tblFile (stored now or before)
+def import_succeeded(result):
+    return result["status"] in (STATUS_INSERTED, STATUS_REPLACED, STATUS_DUPLICATE)
+
+# Function to stream a file into binDataFile from the given offset, committing each chunk
+# An interrupted upload is resumed by calling this again with the committed length as offset
+def upload_chunks(file_path, file_name, offset=0, progress=None):
+    file_size = os.path.getsize(file_path)
+    sql_query = text(APPEND_CHUNK_SQL)
+    with open(file_path, "rb") as file, dbengine.connect() as connection:
+        file.seek(offset)
+        while offset < file_size:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            result = connection.execute(sql_query, {"chunk": chunk, "name": file_name, "offset": offset})
+            connection.commit()
+            if result.rowcount != 1:
+                raise RuntimeError(f"Upload of '{file_name}' was changed by another session at byte {offset}")
+            offset += len(chunk)
+            if progress:
+                progress(offset, file_size)
+    return offset
+
+# Columns shown in the Import window table
+FILE_LIST_COLUMNS = ["NameJob", "NameFile", "TypeFile"]
+
+# Function to fetch one page of tblFile for display, seeking on the NameFile index (keyset paging)
+# Forward pages start after key (or at it when inclusive); backward pages end before key.
+# No key means the first page (forward) or the last page (backward).
+# Returns (columns, rows, has_previous, has_next); rows are always in NameFile order.
+def fetch_file_page(key=None, backward=False, inclusive=False, size=None):
+    size = size or page_size
+    if key is None:
+        condition = ""
+    elif backward:
+        condition = "WHERE NameFile < :key"
+    else:
+        condition = "WHERE NameFile >= :key" if inclusive else "WHERE NameFile > :key"
+    sql_query = text(f"""
+        SELECT {", ".join(FILE_LIST_COLUMNS)} FROM [dbo].[tblFile]
+        {condition}
+        ORDER BY NameFile {"DESC" if backward else "ASC"}
+        OFFSET 0 ROWS FETCH NEXT :fetch ROWS ONLY
+    """)
+    with dbengine.connect() as connection:
+        # One extra row tells whether another page exists in this direction
+        rows = [tuple(row) for row in connection.execute(sql_query, {"key": key, "fetch": size + 1})]
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if backward:
+        rows.reverse()
+        return FILE_LIST_COLUMNS, rows, has_more, key is not None
+    return FILE_LIST_COLUMNS, rows, key is not None, has_more
+
+# Only files whose chunked upload has finished are handed to Gen File
+COMPLETE_FILE_FILTER = "(SizeFile IS NULL OR DATALENGTH(binDataFile) = SizeFile)"
+
+# Function to list (NameFile, HashFile) of the files Gen File will process, in Gen File order
+def list_complete_files():
+    with dbengine.connect() as connection:
+        sql_query = text(f"SELECT NameFile, HashFile FROM [dbo].[tblFile] WHERE {COMPLETE_FILE_FILTER} ORDER BY NameFile")
+        return [tuple(row) for row in connection.execute(sql_query)]
+
+# Function to stream (NameJob, NameFile, TypeFile, HashFile, blob) for the given files, ordered by NameFile
+# Each query fetches at most batch_size files; rows are read from the cursor one at a time,
+# so only the blob being handed over is held here. blob is a blobstore.Blob (None when binDataFile is NULL):
+# blobs under GENFILE_SPILL_THRESHOLD_MB arrive in the row, larger ones are downloaded to a temp file.
+# hashes ({NameFile: HashFile}) names the files to look up in the local blob cache: for a cached file only
+# its metadata is fetched, and a file that had to be fetched is added to the cache for the next run.
+def iter_blobs(names, batch_size=50, hashes=None):
+    sql_query = text(f"""
+        SELECT NameJob, NameFile, TypeFile, HashFile, DATALENGTH(binDataFile) AS SizeData,
+            CASE WHEN DATALENGTH(binDataFile) < :spill AND NameFile NOT IN :cached THEN binDataFile END AS binDataFile
+        FROM [dbo].[tblFile]
+        WHERE {COMPLETE_FILE_FILTER} AND NameFile IN :names
+        ORDER BY NameFile
+    """).bindparams(bindparam("names", expanding=True), bindparam("cached", expanding=True))
+    names = sorted(names)
+    cached = {name for name in names if blobcache.contains((hashes or {}).get(name))}
+    for start in range(0, len(names), batch_size):
+        batch = names[start:start + batch_size]
+        with dbengine.connect() as connection:
+            result = connection.execution_options(stream_results=True, max_row_buffer=1).execute(sql_query, {
+                "names": batch,
+                "cached": [name for name in batch if name in cached],
+                "spill": blobstore.spill_threshold,
+            })
+            for name_job, name_file, type_file, file_hash, size_data, bin_data_file in result:
+                if size_data is None:
+                    blob = None
+                elif bin_data_file is not None:
+                    blob = blobstore.Blob(data=bytes(bin_data_file))
+                    cache_blob(file_hash, blob)
+                else:
+                    blob = blobcache.get(file_hash, size_data) if name_file in cached else None  # None when the entry fails its check
+                    if blob is None:
+                        blob = download_blob(name_file, size_data)
+                        cache_blob(file_hash, blob)
+                bin_data_file = None
+                yield name_job, name_file, type_file, file_hash, blob
+
+# Function to add a fetched blob to the local blob cache; a copy that cannot be written is skipped
+def cache_blob(file_hash, blob):
+    try:
+        blobcache.put_blob(file_hash, blob)
+    except Exception:
+        pass
+
+# Function to download one file's binDataFile to a temp file in chunk_size pieces
+# Uses its own connection, since the streaming query still holds the other one
+# Returns a temporary blobstore.Blob that deletes the file when closed
+def download_blob(name_file, size):
+    sql_query = text("SELECT SUBSTRING(binDataFile, :offset + 1, :length) FROM [dbo].[tblFile] WHERE NameFile = :name")
+    path = blobstore.spill_path(name_file)
+    try:
+        with dbengine.connect() as connection, open(path, "wb") as spill_file:
+            offset = 0
+            while offset < size:
+                piece = connection.execute(sql_query, {"name": name_file, "offset": offset, "length": chunk_size}).scalar()
+                if not piece:
+                    raise ValueError(f"File '{name_file}' ended at {offset:,} of {size:,} bytes")
+                spill_file.write(piece)
+                offset += len(piece)
+    except Exception:
+        os.remove(path)
+        raise
+    return blobstore.Blob(path=path, temporary=True)
+
+# Function to read which file content each existing Gen File table holds
+# Returns {(HashFile, FileIndex): [(TableName, TableCount), ...]}; appended and merged files have FileIndex APPENDED_INDEX
+def fetch_load_records():
+    with dbengine.connect() as connection:
+        sql_query = text("""
+            SELECT HashFile, FileIndex, TableName, TableCount FROM [dbo].[tblFileLoad]
+            WHERE OBJECT_ID(N'[dbo].' + QUOTENAME(TableName)) IS NOT NULL
+        """)
+        records = {}
+        for file_hash, file_index, table_name, table_count in connection.execute(sql_query):
+            records.setdefault((bytes(file_hash), file_index), []).append((table_name, table_count))
+        return records
+
+# Function to record that the given tables now hold one file's content (or forget them if the load failed)
+def record_loads(file_hash, file_index, table_names, table_count, loaded=True):
+    if not table_names:
+        return
+    with dbengine.begin() as connection:
+        connection.execute(
+            text("DELETE FROM [dbo].[tblFileLoad] WHERE TableName IN :tables").bindparams(bindparam("tables", expanding=True)),
+            {"tables": list(table_names)},
+        )
+        if loaded and file_hash is not None:
+            connection.execute(
+                text("INSERT INTO [dbo].[tblFileLoad] (TableName, HashFile, FileIndex, TableCount) VALUES (:table, :hash, :index, :count)"),
+                [{"table": table_name, "hash": file_hash, "index": file_index, "count": table_count} for table_name in table_names],
+            )
+
+# Function to record that the given append or merge tables now also hold one file's content (or forget it if the load failed)
+# Unlike record_loads, the records of other files in the same tables are kept
+# file_index is APPENDED_INDEX, or the file's index for tables it loaded that a higher index overwrote (see record_superseded)
+def record_appends(file_hash, table_names, table_count, loaded=True, file_index=APPENDED_INDEX):
+    if not table_names or file_hash is None:
+        return
+    with dbengine.begin() as connection:
+        connection.execute(
+            text("DELETE FROM [dbo].[tblFileLoad] WHERE HashFile = :hash AND TableName IN :tables").bindparams(bindparam("tables", expanding=True)),
+            {"hash": file_hash, "tables": list(table_names)},
+        )
+        if loaded:
+            connection.execute(
+                text("INSERT INTO [dbo].[tblFileLoad] (TableName, HashFile, FileIndex, TableCount) VALUES (:table, :hash, :index, :count)"),
+                [{"table": table_name, "hash": file_hash, "index": file_index, "count": table_count} for table_name in table_names],
+            )
+
+# Function to record the tables a file loaded that a file at a higher index then overwrote (shared XLSX sheet tables)
+# Kept next to the owner's record, so Gen File can skip the file while its tables' owners are unchanged (see genfile.plan_gen_file).
+# Needs sql/005 (one row per TableName and HashFile); without it the rows are not kept and the file is parsed again next run.
+def record_superseded(file_hash, file_index, table_names, table_count):
+    try:
+        record_appends(file_hash, table_names, table_count, file_index=file_index)
+    except IntegrityError:
+        pass
@@ -0,0 +1,710 @@
+import itertools
+import multiprocessing  # Gen File parses on a process pool
+import os
+import pickle
+import queue
+import re
+import tempfile
+import threading  # Import threading module
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import pandas as pd
+from pandas.io.parsers import TextParser
+import config  # Loads .env once for every module
+import blobstore  # In-memory or spilled blobs for the parsers
+import bulkload  # Bulk-load strategies for DataFrames
+import coltypes  # Column type inference for typed loads
+import csvsniff  # CSV delimiter and encoding detection
+import filestore  # tblFile storage operations
+import instrument  # Per-stage timings and round-trip counts
+import jobcache  # Cached tblFileJob metadata
+import readers  # Streaming file readers
+
+# Gen File worker settings (override in .env)
+parse_workers = int(os.getenv("GENFILE_PARSE_WORKERS", str(os.cpu_count() or 1)))  # Processes parsing blobs
+load_workers = int(os.getenv("GENFILE_LOAD_WORKERS", "4"))  # Threads loading DataFrames into the database
+queue_size = int(os.getenv("GENFILE_QUEUE_SIZE", "4"))  # Parsed files waiting to be loaded
+fetch_batch = int(os.getenv("GENFILE_FETCH_BATCH", "50"))  # Blobs per streaming fetch query
+skip_unchanged = os.getenv("GENFILE_SKIP_UNCHANGED", "1") != "0"  # Skip files whose content is already loaded
+batch_rows = int(os.getenv("GENFILE_BATCH_ROWS", "50000"))  # Rows per streamed batch
+csv_memory_budget = int(float(os.getenv("GENFILE_CSV_MEMORY_MB", "256")) * 1024 * 1024)  # Memory for parsing one CSV
+xlsx_engine = os.getenv("GENFILE_XLSX_ENGINE", "auto").strip().lower()  # auto, openpyxl or calamine
+stream_threshold = int(float(os.getenv("GENFILE_STREAM_THRESHOLD_MB", "32")) * 1024 * 1024)  # Blobs this large are streamed batch by batch
+typed_load = os.getenv("GENFILE_TYPED_LOAD", "0") != "0"  # Create typed columns instead of text (see coltypes)
+type_sample_rows = int(os.getenv("GENFILE_TYPE_SAMPLE_ROWS", "10000"))  # Rows sampled to infer column types
+table_naming = os.getenv("GENFILE_TABLE_NAMING", "index").strip().lower()  # index, job or file (see table_base)
+
+# Load modes a job can set in tblFileJob.xLoadMode (see sql/005_tblFileJob_loadmode.sql)
+LOAD_MODES = ("replace", "append", "merge")
+
+# Longest base table name; leaves room for the sheet suffix and merge's "__stage" within SQL Server's 128 characters
+MAX_TABLE_BASE = 110
+
+# Parsed CSV text takes roughly this many times its size in a DataFrame
+CSV_MEMORY_FACTOR = 5
+
+# Marks the end of the load queue
+_STOP = object()
+
+# Error raised by a parser; level is "error", "warning" or "info" like the messagebox it maps to
+class GenFileError(Exception):
+    def __init__(self, title, message, level="error"):
+        super().__init__(title, message, level)  # Keep every argument so it pickles back from a worker process
+        self.title = title
+        self.message = message
+        self.level = level
+
+    def __str__(self):
+        return self.message
+
+# Function to stream an XML (SpreadsheetML) blob as load tasks of batch_rows rows each
+def iter_xml(index, name_file, blob, dbwh, table_base=None):
+    table_name = table_base or f'tblImport{dbwh}_{index}_xml'.replace('-', '').lower()
+    error_prefix = f"Error inserting into the database for file '{name_file}'"
+    batches = readers.iter_xml_batches(blob, batch_rows)
+    while True:
+        try:
+            batch = next(batches, None)
+            if batch is None:
+                return
+            row_count, columns = batch
+            with instrument.stage("frame", name_file):
+                dfx = pd.DataFrame({f'{k + 1}': column for k, column in enumerate(columns)}, index=pd.RangeIndex(row_count))
+                dfx[f'{len(columns) + 1}'] = name_file
+        except ET.ParseError as e:
+            raise GenFileError("Error", f"Error parsing XML file '{name_file}': {e}")
+        except Exception as e:
+            raise GenFileError("Error", f"{error_prefix}: {e}")
+        yield table_name, dfx, error_prefix
+
+# Function to build a sheet DataFrame exactly as pd.ExcelFile.parse(header=None) does
+def xlsx_frame(rows):
+    if not rows:
+        return pd.DataFrame()
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    return TextParser(rows, header=None, skip_blank_lines=False).read()
+
+# Function to build the frames of a sheet too long for one frame, typed as one frame of the whole sheet would be
+# Each batch is converted like xlsx_frame and spilled to a temporary file while the column types of the whole
+# sheet are worked out (see fold_dtypes); the frames are then read back and cast to those types, so no batch
+# is written before the types are known and the workbook is still read only once.
+def xlsx_batch_frames(name_file, batches):
+    kinds = {}
+    frame_count = 0
+    with tempfile.TemporaryFile(prefix="genfile_", suffix=".tmp", dir=blobstore.spill_dir) as spill:
+        for batch in batches:
+            df = timed_frame(xlsx_frame, name_file, [row or [""] for row in batch])
+            fold_dtypes(kinds, df)
+            pickle.dump(df, spill, protocol=pickle.HIGHEST_PROTOCOL)
+            frame_count += 1
+        dtypes = settle_dtypes(kinds, bool_number=True)
+        spill.seek(0)
+        for _ in range(frame_count):
+            yield timed_frame(cast_frame, name_file, pickle.load(spill), dtypes)
+
+# Function to give a frame every column of dtypes (missing ones empty) with those dtypes
+def cast_frame(df, dtypes):
+    df = df.reindex(columns=list(dtypes))
+    for column, dtype in dtypes.items():
+        if df[column].dtype != dtype:
+            df[column] = df[column].astype(dtype)
+    return df
+
+# Function to build a DataFrame with build(*args), timed as the "frame" stage of a file
+def timed_frame(build, name_file, *args):
+    with instrument.stage("frame", name_file):
+        return build(*args)
+
+# Function to stream an XLSX blob sheet by sheet as load tasks
+# Sheets of up to batch_rows rows load exactly as before; larger sheets load in batches typed like the whole sheet
+def iter_xlsx(index, name_file, blob, dbwh, table_base=None):
+    try:
+        for sheet_index, (_, rows) in enumerate(readers.iter_xlsx_sheets(blob, xlsx_engine)):
+            table_name = f'{table_base}_{sheet_index}' if table_base else f'tblImportExcel{dbwh}_{sheet_index}_xlsx'.replace("-", "").lower()
+            error_prefix = f"Failed to save data from sheet index {sheet_index} to database"
+            batches = readers.iter_sheet_batches(rows, batch_rows)
+            first = next(batches, [])
+            second = next(batches, None) if len(first) >= batch_rows else None
+
+            if second is None:
+                with instrument.stage("frame", name_file):
+                    frames = [xlsx_frame(first)]
+            else:
+                frames = xlsx_batch_frames(name_file, itertools.chain([first, second], batches))
+                first = second = None
+
+            for df_sheet in frames:
+                df_sheet['name_file'] = name_file
+                df_sheet.columns = [f'{i}' for i in range(len(df_sheet.columns))]
+                yield table_name, df_sheet, error_prefix
+    except GenFileError:
+        raise
+    except Exception as e:
+        raise GenFileError("Error", f"Failed to process XLSX file: {str(e)}")
+
+# Function to estimate how many CSV rows fit in the memory budget with two chunks in flight
+# Returns (chunk_rows, line_bytes) where line_bytes is the average line length in the sample
+def csv_chunking(blob):
+    sample = blob.head(64 * 1024)
+    line_bytes = len(sample) / max(sample.count(b"\n"), 1)
+    chunk_rows = max(1000, int(csv_memory_budget / 2 / (line_bytes * CSV_MEMORY_FACTOR)))
+    return chunk_rows, line_bytes
+
+# Function to stream a CSV blob as load tasks of at most chunk_rows rows (see csv_chunking)
+# Chunk N+1 is parsed on a helper thread while chunk N is being written
+# The delimiter and encoding are detected first (see csvsniff)
+def iter_csv(index, name_file, blob, dbwh, table_base=None):
+    csv_data = None
+    try:
+        # Detect the delimiter and encoding; a file that would mis-parse stops here
+        try:
+            delimiter, encoding = csvsniff.sniff(blob.view())
+        except csvsniff.CsvSniffError as e:
+            raise GenFileError(e.title, f"Cannot read CSV file {name_file}: {e}", level="warning")
+        table_prefix = csvsniff.DELIMITERS[delimiter]
+
+        # Read the CSV file using pandas, one chunk at a time; for files larger than one chunk
+        # the column types of the whole file are worked out first, so every chunk gets the same ones
+        chunk_rows, line_bytes = csv_chunking(blob)
+        chunked = len(blob) > chunk_rows * line_bytes
+        dtypes = csv_dtypes(blob, delimiter, encoding, chunk_rows) if chunked else None
+        csv_data = blob.open()
+        chunks = pd.read_csv(csv_data, delimiter=delimiter, encoding=encoding, header=None, chunksize=chunk_rows, dtype=dtypes)
+    except GenFileError:
+        raise
+    except Exception as e:
+        if csv_data is not None:
+            csv_data.close()
+        raise GenFileError("Error", f"Failed to process CSV file: {str(e)}")
+
+    # Clean up table name (replace spaces with underscores and convert to lowercase)
+    table_name = table_base or f'tblImport{table_prefix}{dbwh}_{index}_csv'.replace("-", "").lower()
+    parsed = prefetch(chunks)
+    try:
+        while True:
+            try:
+                df_csv = next(parsed, None)
+                if df_csv is None:
+                    return
+
+                # Add the 'name_file' column to the DataFrame
+                df_csv['name_file'] = name_file
+
+                # Rename columns dynamically as [0], [1], [2], ..., [N]
+                df_csv.columns = [f'{i}' for i in range(len(df_csv.columns))]
+            except Exception as e:
+                raise GenFileError("Error", f"Failed to process CSV file: {str(e)}")
+
+            # Approximate bytes of the blob behind this chunk, for the MB/s readout
+            df_csv.attrs["source_bytes"] = int(len(df_csv) * line_bytes)
+            yield table_name, df_csv, "Failed to save CSV data to database"
+    finally:
+        # Stop the helper thread before the file it reads from is closed
+        parsed.close()
+        csv_data.close()
+
+# Function to work out the read_csv dtypes of a CSV file larger than one chunk, as one read of the whole file gives them
+# Every chunk is parsed once with pandas' own inference and the dtypes are folded together (see fold_dtypes),
+# so a column holding "abc" or 3.5 after a run of whole numbers is read as text or float from the first chunk on.
+# This costs one extra parse of the file, done before any chunk is written.
+def csv_dtypes(blob, delimiter, encoding, chunk_rows):
+    kinds = {}
+    with blob.open() as data:
+        for chunk in pd.read_csv(data, delimiter=delimiter, encoding=encoding, header=None, chunksize=chunk_rows):
+            fold_dtypes(kinds, chunk)
+    return {column: str if dtype == object else dtype for column, dtype in settle_dtypes(kinds).items()}
+
+# Function to name the kind of values a column dtype holds
+def dtype_kind(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return "bool"
+    elif pd.api.types.is_integer_dtype(dtype):
+        return "int"
+    elif pd.api.types.is_float_dtype(dtype):
+        return "float"
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        return "datetime"
+    return "object"
+
+# Function to fold the column dtypes of one batch of a table into kinds
+# kinds maps column -> ({kind: dtype}, whether the column has an empty value) and is updated in place;
+# a column missing from a batch, or with no value in it, counts as empty there.
+def fold_dtypes(kinds, df):
+    later = bool(kinds)  # A column first seen in a later batch was empty in the earlier ones
+    for column in set(kinds) | set(df.columns):
+        seen, empty = kinds.get(column, ({}, later))
+        if column not in df.columns:
+            empty = True
+        else:
+            missing = df[column].isna()
+            if missing.all():
+                empty = True
+            else:
+                kind = dtype_kind(df[column].dtype)
+                if kind == "object" and seen.get(kind, df[column].dtype) != df[column].dtype:
+                    seen[kind] = object  # Text in some batches, mixed values in others
+                else:
+                    seen.setdefault(kind, df[column].dtype)
+                empty = empty or bool(missing.any())
+        kinds[column] = (seen, empty)
+
+# Function to pick each column's dtype from fold_dtypes' kinds, the one pandas gives when it reads every row at once
+# Whole numbers with an empty value become float, whole numbers mixed with decimals become float, columns with
+# no value become float (all NaN) and any other mix becomes object. With bool_number set, true/false mixes
+# with numbers and empty values like 1/0 (the XLSX reader); read_csv makes such a mix object.
+def settle_dtypes(kinds, bool_number=False):
+    numbers = {"int", "float", "bool"} if bool_number else {"int", "float"}
+    dtypes = {}
+    for column in sorted(kinds):
+        seen, empty = kinds[column]
+        if not seen:
+            dtypes[column] = "float64"
+        elif set(seen) == {"bool"} and not empty:
+            dtypes[column] = "bool"
+        elif set(seen) <= numbers:
+            dtypes[column] = "int64" if set(seen) <= {"int", "bool"} and not empty else "float64"
+        elif len(seen) == 1 and "datetime" in seen:
+            dtypes[column] = seen["datetime"]
+        elif set(seen) == {"object"}:
+            dtypes[column] = seen["object"]
+        else:
+            dtypes[column] = object
+    return dtypes
+
+# Function to run an iterator on a helper thread, keeping up to depth items ready ahead of the consumer
+# Closing the generator waits for the helper thread, so whatever the iterator reads can be closed next
+def prefetch(iterable, depth=1):
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    # Function to hand one item over unless the consumer has gone away
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+            put((False, None))
+        except Exception as e:
+            put((False, e))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            has_item, item = items.get()
+            if not has_item:
+                if item is not None:
+                    raise item
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+# Parsers by file type (TypeFile without the dot, lowercase)
+PARSERS = {
+    "xml": iter_xml,
+    "xlsx": iter_xlsx,
+    "csv": iter_csv,
+}
+
+# Function to give every load task compact column types (typed load)
+# The first batch of a table fixes its types (inferred from a sample, or taken from the job's schema);
+# later batches of the same table are converted to those types.
+def iter_typed(tasks, schema=None):
+    table_types = {}
+    for table_name, df, error_prefix in tasks:
+        try:
+            with instrument.stage("type"):
+                df, types = coltypes.apply_types(df, table_types.get(table_name, schema), type_sample_rows)
+        except coltypes.ColumnTypeError as e:
+            raise GenFileError("Error", f"{error_prefix}: {e}. Fix the job's xSchema or set GENFILE_TYPED_LOAD=0.")
+        table_types[table_name] = types
+        df.attrs["sql_types"] = types
+        yield table_name, df, error_prefix
+
+# Function to turn a job or file name into part of a table name (letters, digits and underscores, lower case)
+def name_part(name):
+    return re.sub(r"\W+", "_", name).strip("_").lower()
+
+# Function to pick the stable base table name of a file, or None for the index-based names
+# A job's xTableName wins; otherwise GENFILE_TABLE_NAMING decides: "job" gives tblImport<DB_WH>_<job>,
+# "file" gives tblImport<DB_WH>_<job>_<file name>, "index" keeps the names based on the file's position.
+# 'append' and 'merge' jobs always get a stable name, since positions shift as files are added.
+def table_base(name_job, name_file, dbwh, load_options):
+    if load_options["table"]:
+        return name_part(load_options["table"])[:MAX_TABLE_BASE]
+    naming = table_naming
+    if naming not in ("job", "file") and load_options["mode"] != "replace":
+        naming = "job"
+    if naming == "job":
+        base = f"tblImport{dbwh}_{name_part(name_job)}"
+    elif naming == "file":
+        base = f"tblImport{dbwh}_{name_part(name_job)}_{name_part(os.path.splitext(name_file)[0])}"
+    else:
+        return None
+    return base.replace("-", "").lower()[:MAX_TABLE_BASE]
+
+# Function to stream one blob as (table_name, DataFrame, error_prefix) load tasks
+# Several tasks for the same table are consecutive batches: the first replaces the table, the rest append
+# With typed_load set, columns get compact types; schema ({column: type}) fixes the types of some columns.
+# table_base (see table_base) replaces the index-based table names; XLSX sheets add _<sheet index>.
+# Producing each task is timed as the "parse" stage (minus the "frame" and "type" stages inside it).
+# bin_data_file is bytes or a blobstore.Blob; the caller closes a Blob once the tasks are consumed.
+def iter_file(index, name_job, name_file, db_type_file, bin_data_file, dbwh, typed_load=typed_load, schema=None, table_base=None):
+    # Replace "." with an empty string in db_type_file
+    db_type_file = db_type_file.replace(".", "")
+    parser = PARSERS.get(db_type_file.lower())
+    if parser is None:
+        raise GenFileError("File Type", f"Unsupported file type: {db_type_file} for job: {name_job}", level="info")
+    tasks = parser(index, name_file, blobstore.as_blob(bin_data_file), dbwh, table_base)
+    tasks = iter_typed(tasks, schema) if typed_load else tasks
+    while True:
+        with instrument.stage("parse", name_file) as parse:
+            task = next(tasks, None)
+            if task is not None:
+                parse["rows"] = len(task[1])
+        if task is None:
+            return
+        yield task
+
+# Function to parse one blob completely into a list of load tasks
+# Runs in a worker process, so it must stay importable without tkinter
+# Returns (tasks, stages) where stages are the file's stage timings for instrument.merge
+def parse_file(index, name_job, name_file, db_type_file, bin_data_file, dbwh, typed_load=typed_load, schema=None, table_base=None):
+    blob = blobstore.as_blob(bin_data_file)
+    try:
+        with instrument.capture() as stages:
+            tasks = list(iter_file(index, name_job, name_file, db_type_file, blob, dbwh, typed_load, schema, table_base))
+    finally:
+        blob.close()
+    return tasks, stages
+
+# Function to decide which files to load and which unchanged files to skip
+# files is [(NameFile, HashFile)] in Gen File order; records is filestore.fetch_load_records().
+# A file is skipped when every table it loaded at the same index still exists and still holds its content,
+# or when it was already appended or merged into every one of its tables.
+# A file whose tables were partly or wholly overwritten by higher indexes (shared XLSX sheet tables) is
+# skipped only while each of those tables' owners (the highest index recorded for it) is skipped too.
+# Returns (to_load, skipped): to_load is [(index, NameFile, HashFile)], skipped is {index: [TableName, ...]}
+def plan_gen_file(files, records):
+    owners = {}  # TableName -> (FileIndex, HashFile) of the highest index recorded for it
+    for (file_hash, file_index), tables in records.items():
+        for table_name, table_count in tables:
+            if table_name not in owners or file_index > owners[table_name][0]:
+                owners[table_name] = (file_index, file_hash)
+
+    to_load = []
+    skipped = {}
+    superseded = []
+    for index, (name_file, file_hash) in enumerate(files):
+        tables = None
+        appended = False
+        if skip_unchanged and file_hash is not None:
+            tables = records.get((bytes(file_hash), index))
+            if not tables:
+                tables = records.get((bytes(file_hash), filestore.APPENDED_INDEX))
+                appended = True
+        if not (tables and all(table_count == len(tables) for table_name, table_count in tables)):
+            to_load.append((index, name_file, file_hash))
+        elif not appended and any(owners[table_name][0] > index for table_name, table_count in tables):
+            superseded.append((index, name_file, file_hash, tables))
+        else:
+            skipped[index] = [table_name for table_name, table_count in tables]
+
+    # Highest index first, so an owner that is itself partly superseded is decided before the files below it
+    for index, name_file, file_hash, tables in reversed(superseded):
+        if all(
+            owners[table_name][0] == index
+            or owners[table_name][0] in skipped and bytes(files[owners[table_name][0]][1]) == owners[table_name][1]
+            for table_name, table_count in tables
+        ):
+            skipped[index] = [table_name for table_name, table_count in tables]
+        else:
+            to_load.append((index, name_file, file_hash))
+    to_load.sort(key=lambda item: item[0])
+    return to_load, skipped
+
+# Function to run Gen File over every complete file in tblFile
+# files is [(NameFile, HashFile)] from filestore.list_complete_files (listed here when not given);
+# blobs, for tests, is an iterable of (index, NameJob, NameFile, TypeFile, HashFile, binDataFile) that bypasses tblFile;
+# binDataFile is bytes or a blobstore.Blob, which is closed (and a spilled temp file deleted) once the file is loaded.
+# Unchanged files are skipped (see plan_gen_file); the others arrive in NameFile order through one
+# streaming query per GENFILE_FETCH_BATCH files (see filestore.iter_blobs); files in the local blob cache
+# (see blobcache) are read from disk and only their metadata is fetched.
+# Blobs are parsed on a process pool and loaded on a thread pool, connected by a bounded queue;
+# blobs of GENFILE_STREAM_THRESHOLD_MB or more are parsed by the loader in batches of GENFILE_BATCH_ROWS rows.
+# progress(done_files) is called as each file finishes; report(level, title, message) receives every error;
+# throughput(rows, source_bytes, seconds) is called with running totals after each load.
+# With typed_load, tables get compact column types, using each job's xSchema where it has one.
+# Each job's xLoadMode decides how files reach their tables: 'replace' (the default) recreates them,
+# 'append' adds the rows of new files and 'merge' upserts them on xKeyColumns (see bulkload.merge_dataframe).
+# Returns a summary dict of files, skipped files, rows, source bytes and seconds.
+def run_gen_file(dbwh, progress=None, report=None, throughput=None, parse_workers=parse_workers, load_workers=load_workers, files=None, blobs=None, typed_load=typed_load):
+    report = report or (lambda level, title, message: None)
+    load_queue = queue.Queue(maxsize=max(queue_size, 1))
+    state_lock = threading.Lock()
+    record_lock = threading.Lock()
+    table_locks = {}
+    loaded_index = {}  # Highest file index loaded into each 'replace' table
+    job_options = {}  # Load options of each job seen in this run
+    replaced = []  # (index, NameFile, HashFile, tables) of each file cleanly loaded in 'replace' mode
+    done = [0]
+    totals = {"rows": 0, "bytes": 0}
+    start = time.perf_counter()
+
+    # Skip unchanged files; their tables count as loaded at their index so lower indexes do not overwrite them
+    skipped = {}
+    if blobs is None:
+        files = filestore.list_complete_files() if files is None else files
+        to_load, skipped = plan_gen_file(files, filestore.fetch_load_records() if skip_unchanged else {})
+        for index, table_names in skipped.items():
+            for table_name in table_names:
+                loaded_index[table_name] = max(loaded_index.get(table_name, -1), index)
+        positions = {name_file: index for index, name_file, file_hash in to_load}
+        hashes = {name_file: file_hash for index, name_file, file_hash in to_load}
+        blobs = ((positions[row[1]],) + row for row in filestore.iter_blobs(positions, fetch_batch, hashes))
+
+    # Function to look up a job's column types for typed loads (None: infer every column)
+    def job_schema(name_job):
+        try:
+            return jobcache.job_schema(name_job)
+        except Exception as e:
+            report("warning", "Warning", f"Failed to read the schema of job '{name_job}', inferring column types: {e}")
+            return None
+
+    # Function to look up a job's load options once per run; unknown or unreadable options fall back to 'replace'
+    def job_load_options(name_job):
+        if name_job not in job_options:
+            try:
+                load_options = jobcache.job_load_options(name_job)
+                if load_options["mode"] not in LOAD_MODES:
+                    report("warning", "Warning", f"Unknown load mode '{load_options['mode']}' for job '{name_job}', replacing its tables")
+                    load_options["mode"] = "replace"
+            except Exception as e:
+                report("warning", "Warning", f"Failed to read the load mode of job '{name_job}', replacing its tables: {e}")
+                load_options = dict(jobcache.DEFAULT_LOAD_OPTIONS)
+            job_options[name_job] = load_options
+        return job_options[name_job]
+
+    # Function to add loaded rows and source bytes to the throughput readout
+    def count(rows, source_bytes):
+        with state_lock:
+            totals["rows"] += rows
+            totals["bytes"] += source_bytes
+            total_rows, total_bytes = totals["rows"], totals["bytes"]
+        if throughput:
+            throughput(total_rows, total_bytes, time.perf_counter() - start)
+
+    # Function to mark one file as finished
+    def file_done():
+        with state_lock:
+            done[0] += 1
+            done_files = done[0]
+        if progress:
+            progress(done_files)
+
+    # Function to remember which tables now hold this file's content (or forget them after a failure)
+    # Tables of a 'replace' file that a higher index overwrites are recorded once every file is loaded (see record_overwritten)
+    def record(index, name_file, file_hash, started, clean, mode):
+        try:
+            with record_lock, instrument.stage("record", name_file):
+                if mode != "replace":
+                    filestore.record_appends(file_hash, started, len(started), loaded=clean)
+                elif clean:
+                    with state_lock:
+                        owned = [table_name for table_name in started if loaded_index.get(table_name) == index]
+                    filestore.record_loads(file_hash, index, owned, len(started))
+                    replaced.append((index, name_file, file_hash, started))
+                else:
+                    filestore.record_loads(file_hash, index, started, len(started), loaded=False)
+        except Exception as e:
+            report("warning", "Warning", f"Failed to record the load of file '{name_file}': {e}")
+
+    # Function to record, after the last load, the tables of 'replace' files that a higher index overwrote
+    # Done at the end because the owners' record_loads replaces every record of their tables
+    def record_overwritten():
+        for index, name_file, file_hash, started in replaced:
+            superseded = [table_name for table_name in started if loaded_index.get(table_name) != index]
+            try:
+                with instrument.stage("record", name_file):
+                    filestore.record_superseded(file_hash, index, superseded, len(started))
+            except Exception as e:
+                report("warning", "Warning", f"Failed to record the load of file '{name_file}': {e}")
+
+    # Function to load the tasks of one file; a lazy iterator is parsed here batch by batch
+    # Returns the source bytes already counted by streamed batches
+    # mode and keys are the file's job load mode and merge key columns
+    def load_tasks(index, name_file, file_hash, tasks, mode, keys):
+        started = set()  # Tables this file has already replaced (or appended to)
+        failed = set()  # Tables whose earlier batch failed to load
+        counted_bytes = 0
+        clean = True
+        try:
+            for table_name, df, error_prefix in tasks:
+                if_exists = 'replace' if mode == "replace" and table_name not in started else 'append'
+                started.add(table_name)
+                if table_name in failed:
+                    continue
+                with state_lock:
+                    table_lock = table_locks.setdefault(table_name, threading.Lock())
+                with table_lock:
+                    # Files sharing a 'replace' table keep the sequential result: the highest index wins
+                    if mode == "replace" and loaded_index.get(table_name, -1) > index:
+                        continue
+                    try:
+                        with instrument.stage("load", name_file, rows=len(df), bytes=df.attrs.get("source_bytes", 0)):
+                            if mode == "merge":
+                                bulkload.merge_dataframe(df, table_name, keys)
+                            else:
+                                bulkload.load_dataframe(df, table_name, if_exists=if_exists)
+                        if mode == "replace":
+                            with state_lock:
+                                loaded_index[table_name] = index
+                        source_bytes = df.attrs.get("source_bytes", 0)
+                        counted_bytes += source_bytes
+                        count(len(df), source_bytes)
+                    except Exception as e:
+                        failed.add(table_name)
+                        clean = False
+                        report("error", "Error", f"{error_prefix}: {e}")
+        except GenFileError as e:
+            clean = False
+            report(e.level, e.title, e.message)
+        except Exception as e:
+            clean = False
+            report("error", "Error", f"Failed to process file '{name_file}': {e}")
+        if file_hash is not None:
+            record(index, name_file, file_hash, started, clean, mode)
+        return counted_bytes
+
+    # Loader thread body
+    def loader():
+        with instrument.profile_thread():
+            while True:
+                item = load_queue.get()
+                if item is _STOP:
+                    break
+                index, name_file, file_hash, size, tasks, mode, keys, blob = item
+                try:
+                    counted_bytes = load_tasks(index, name_file, file_hash, tasks, mode, keys)
+                    count(0, max(size - counted_bytes, 0))
+                finally:
+                    # A streamed file's parser still reads the blob: stop it before the blob goes
+                    if hasattr(tasks, "close"):
+                        tasks.close()
+                    if blob is not None:
+                        blob.close()
+                    instrument.log_file("gen_file", name_file, index=index, mode=mode, bytes=size)
+                    file_done()
+
+    # Function to hand a finished parse to the loaders (blocks while the queue is full)
+    def collect(index, name_file, file_hash, size, mode, keys, blob, future):
+        blob.close()  # The worker has read it (or failed)
+        try:
+            tasks, stages = future.result()
+            instrument.merge(stages)
+        except GenFileError as e:
+            report(e.level, e.title, e.message)
+            file_done()
+            return
+        except Exception as e:
+            report("error", "Error", f"Failed to process file '{name_file}': {e}")
+            file_done()
+            return
+        load_queue.put((index, name_file, file_hash, size, tasks, mode, keys, None))
+
+    loaders = [threading.Thread(target=loader, daemon=True) for _ in range(max(load_workers, 1))]
+    for thread in loaders:
+        thread.start()
+
+    # Spawned (not forked) workers, as on Windows, so no loader thread state is copied into them
+    executor = ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")) if parse_workers > 1 else None
+    in_flight = {}
+    for index in skipped:
+        file_done()
+    blobs = iter(blobs)
+    blob = None
+    try:
+        while True:
+            # Fetching the next blob is timed as the file's "fetch" stage
+            with instrument.stage("fetch") as fetch:
+                row = next(blobs, None)
+                if row is not None:
+                    fetch["file"] = row[2]
+                    fetch["bytes"] = len(row[5]) if row[5] is not None else 0
+            if row is None:
+                break
+
+            # Extract data from the row; each blob is parsed as soon as it arrives
+            index, name_job, name_file, db_type_file, file_hash, bin_data_file = row
+            row = None
+            blob = blobstore.as_blob(bin_data_file) if bin_data_file is not None else None
+            bin_data_file = None
+            file_hash = bytes(file_hash) if file_hash is not None else None
+            schema = job_schema(name_job) if typed_load else None
+            load_options = job_load_options(name_job)
+            mode, keys = load_options["mode"], load_options["keys"]
+            base = table_base(name_job, name_file, dbwh, load_options)
+            if blob is None:
+                report("warning", "No Data", f"No data found for file: {name_file}")
+                file_done()
+                continue
+
+            if executor is None or len(blob) >= stream_threshold:
+                # Large blobs (or no process pool): the loader parses and loads one batch at a time
+                load_queue.put((index, name_file, file_hash, len(blob), iter_file(index, name_job, name_file, db_type_file, blob, dbwh, typed_load, schema, base), mode, keys, blob))
+                blob = None
+                continue
+
+            # Keep at most two parses per worker in flight to bound memory
+            while len(in_flight) >= parse_workers * 2:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(*in_flight.pop(future), future)
+            # A spilled blob reaches the worker as its path; the worker maps the file itself
+            future = executor.submit(parse_file, index, name_job, name_file, db_type_file, blob, dbwh, typed_load, schema, base)
+            in_flight[future] = (index, name_file, file_hash, len(blob), mode, keys, blob)
+            blob = None
+
+    except Exception as e:
+        report("error", "Error", f"Failed to fetch files from the database: {e}")
+    finally:
+        if blob is not None:
+            blob.close()  # Fetched but never handed over
+        try:
+            # Hand over the remaining parses
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(*in_flight.pop(future), future)
+        except Exception as e:
+            report("error", "Error", f"Failed to generate file: {e}")
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for _ in loaders:
+            load_queue.put(_STOP)
+        for thread in loaders:
+            thread.join()
+        record_overwritten()
+
+    summary = {
+        "files": done[0],
+        "skipped": len(skipped),
+        "rows": totals["rows"],
+        "bytes": totals["bytes"],
+        "seconds": time.perf_counter() - start,
+    }
+    instrument.log("gen_file_run", **summary, stages=instrument.stage_totals())
+    return summary
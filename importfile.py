@@ -1,152 +1,48 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from dotenv import load_dotenv
 import os
-from sqlalchemy import create_engine, text
-import pandas as pd
-import io
-import xml.etree.ElementTree as ET
+from sqlalchemy import text
 import warnings
 import threading  # Import threading module
+import time
+import config  # Loads .env once for every module
+import dbengine  # Shared, pooled database engine
+import filestore  # tblFile storage operations
+import bulkload  # Bulk-load strategies for DataFrames
+import instrument  # Per-stage timings and round-trip counts
+import jobcache  # Cached tblFileJob metadata
+import uievents  # Main-thread dispatcher for worker threads
 
 # Ignore warnings
 warnings.simplefilter("ignore")
 
-# Load environment variables from .env file
-load_dotenv()
+# genfile (and with it pandas) is imported by the first Gen File run, not when the form opens
 
-# Retrieve database values from environment variables
-server = os.getenv("DB_SERVER")
-database = os.getenv("DB_DATABASE")
-username = os.getenv("DB_USERNAME")
-password = os.getenv("DB_PASSWORD")
-driver = os.getenv("DB_DRIVER")
-dbwh = os.getenv("DB_WH")  # Database warehouse identifier
+# Retrieve database values from environment variables (connection settings live in dbengine.py)
+dbwh = config.dbwh  # Database warehouse identifier
 
-# Create the database connection engine
-def create_db_connection():
+# Function to fetch values for a combobox (job names, cached by jobcache)
+def fetch_combobox_values():
     try:
-        engine = create_engine(f"mssql+pyodbc:///?odbc_connect=DRIVER={driver};SERVER={server};DATABASE={database};UID={username};PWD={password}")
-        return engine
+        return jobcache.job_names()
     except Exception as e:
-        messagebox.showerror("Database Connection Error", f"Failed to connect to database: {str(e)}")
-        return None
-
-# Function to fetch values for a combobox from the database
-def fetch_combobox_values():
-    engine = create_db_connection()
-    if engine:
-        try:
-            with engine.connect() as connection:
-                sql_query = text("EXEC [dbo].[spFileJob] 'showFile'")
-                result = connection.execute(sql_query).fetchall()
-                combobox_values = [row[0] for row in result]
-                return combobox_values
-        except Exception as e:
-            messagebox.showerror("SQL Query Error", f"Failed to execute query: {str(e)}")
-            return []
-    else:
+        uievents.show("error", "SQL Query Error", f"Failed to execute query: {str(e)}")
         return []
 
-# Function to check if a file with the same name already exists in the database
-def is_duplicate_file(file_name):
-    engine = create_db_connection()
-    if engine:
-        try:
-            with engine.connect() as connection:
-                sql_query = text("SELECT COUNT(*) FROM [dbo].[tblFile] WHERE NameFile = :name")
-                result = connection.execute(sql_query, {"name": file_name}).scalar()
-                return result > 0  # Returns True if a duplicate exists
-        except Exception as e:
-            messagebox.showerror("SQL Query Error", f"Failed to check for duplicate file: {str(e)}")
-            return False
-    else:
-        return False
-
-# Function to validate the file type against the expected type for the selected job
-def validate_file_type(name_job, file_path):
-    engine = create_db_connection()
-    if engine:
-        try:
-            with engine.connect() as connection:
-                sql_query = text("SELECT xFile FROM [dbo].[tblFileJob] WHERE xNameJob = :namejob")
-                result = connection.execute(sql_query, {"namejob": name_job}).fetchone()
-                if result:
-                    expected_file_type = result[0]  # Expected file type from the database
-                    actual_file_type = os.path.splitext(file_path)[1].lower()  # Actual file type from the file path
-                    if actual_file_type == f".{expected_file_type.lower()}":
-                        return True
-                    else:
-                        messagebox.showwarning("File Type Mismatch", f"Expected file type: {expected_file_type}, but selected file type: {actual_file_type}")
-                        return False
-                else:
-                    messagebox.showwarning("Invalid Job", f"No file type found for job: {name_job}")
-                    return False
-        except Exception as e:
-            messagebox.showerror("Validation Error", f"Failed to validate file type: {str(e)}")
-            return False
-    else:
-        return False
-
-# Function to insert file data into the database
-def insert_file_to_db(file_path, name_job):
+# Function to fetch one page of tblFile and return column names, data and whether more pages exist
+# Only the visible page is read (see filestore.fetch_file_page), so this does not slow down as tblFile grows
+def fetch_file_data(key=None, backward=False, inclusive=False):
     try:
-        # Step 1: Validate the file type
-        if not validate_file_type(name_job, file_path):
-            return  # Stop if validation fails
-
-        # Step 2: Extract file name
-        file_name = os.path.basename(file_path)
-
-        # Step 3: Check for duplicate file names
-        if is_duplicate_file(file_name):
-            messagebox.showwarning("Duplicate File", f"A file with the name '{file_name}' already exists in the database.")
-            return
-
-        # Step 4: Read the file as binary data
-        with open(file_path, "rb") as file:
-            binary_data = file.read()
-
-        # Step 5: Extract file type
-        file_type = os.path.splitext(file_name)[1]  # Get file extension
-
-        # Step 6: Create the SQL query to insert data into tblFile
-        sql_query = text("""
-            INSERT INTO [dbo].[tblFile] (NameJob, NameFile, TypeFile, binDataFile)
-            VALUES (:namejob, :name, :type, :data)
-        """)
-
-        # Step 7: Execute the query
-        engine = create_db_connection()
-        if engine:
-            with engine.connect() as connection:
-                connection.execute(sql_query, {"namejob": name_job, "name": file_name, "type": file_type, "data": binary_data})
-                connection.commit()
-                messagebox.showinfo("Success", "File inserted into the database successfully!")
-        else:
-            messagebox.showerror("Error", "Failed to connect to the database.")
+        return filestore.fetch_file_page(key, backward=backward, inclusive=inclusive)
     except Exception as e:
-        messagebox.showerror("Error", f"Failed to insert file into the database: {str(e)}")
+        messagebox.showerror("SQL Query Error", f"Failed to fetch data: {str(e)}")
+        return [], [], False, False
 
-# Function to fetch data from tblFile and return both column names and data
-def fetch_file_data():
-    engine = create_db_connection()
-    if engine:
-        try:
-            with engine.connect() as connection:
-                sql_query = text("SELECT NameJob, NameFile, TypeFile FROM [dbo].[tblFile]")
-                result = connection.execute(sql_query)
-                columns = result.keys()
-                cleaned_columns = [col.replace("RMKeyView(['", "").replace("'])", "") for col in columns]
-                data = [tuple(row) for row in result.fetchall()]
-                if len(data) == 0:
-                    return [], []
-                return cleaned_columns, data
-        except Exception as e:
-            messagebox.showerror("SQL Query Error", f"Failed to fetch data: {str(e)}")
-            return [], []
-    else:
-        return [], []
+# Function to estimate column widths (in pixels) from the header and a sample of rows
+def estimate_column_widths(columns, rows, sample_size=100):
+    step = max(len(rows) // sample_size, 1)
+    sample = rows[::step]
+    return [max([len(str(row[k])) for row in sample] + [len(col)]) * 10 for k, col in enumerate(columns)]
 
 # Function to open the Import File form
 def open_import_file_form():
@@ -180,10 +76,18 @@ def open_import_file_form():
     combobox_label = tk.Label(combined_frame, text="Select Option:", font=("Helvetica", 14), bg="#ffffff")
     combobox_label.pack(side="left", padx=5)
 
-    combobox_values = fetch_combobox_values()  # Fetch values from the database
-    combobox = ttk.Combobox(combined_frame, values=combobox_values, font=("Helvetica", 12), width=30)
+    # Job names come from the cache; if it is not loaded yet they are filled in when it is
+    combobox_values = jobcache.cached_names()
+    combobox = ttk.Combobox(combined_frame, values=combobox_values or [], font=("Helvetica", 12), width=30)
     combobox.pack(side="left", padx=5)
 
+    def load_combobox_values():
+        values = fetch_combobox_values()
+        uievents.post(combobox.config, {"values": values})
+
+    if combobox_values is None:
+        threading.Thread(target=load_combobox_values, daemon=True).start()
+
     # New Row for TextBox, Browse Button, and Import Button
     new_row_frame = tk.Frame(form_frame, bg="#ffffff")
     new_row_frame.pack(fill="x", pady=10)
@@ -195,54 +99,142 @@ def open_import_file_form():
     new_textbox_entry = tk.Entry(new_row_frame, font=("Helvetica", 12), width=50)
     new_textbox_entry.pack(side="left", padx=5)
 
-    # "Browse" Button for New Row
+    # Paths in the TextBox are separated by ";" so several files can be imported at once
+    def set_selected_files(file_paths):
+        new_textbox_entry.delete(0, tk.END)  # Clear the current entry
+        new_textbox_entry.insert(0, "; ".join(file_paths))  # Insert the selected file paths
+
+    # "Browse" Button for New Row (select one or more files)
     def new_browse_file():
-        file_path = filedialog.askopenfilename(title="Select a File", filetypes=(("All files", "*.*"), ("Text files", "*.txt"), ("CSV files", "*.csv")))
-        if file_path:
-            new_textbox_entry.delete(0, tk.END)  # Clear the current entry
-            new_textbox_entry.insert(0, file_path)  # Insert the selected file path
+        file_paths = filedialog.askopenfilenames(title="Select Files", filetypes=(("All files", "*.*"), ("Text files", "*.txt"), ("CSV files", "*.csv")))
+        if file_paths:
+            set_selected_files(file_paths)
 
     new_browse_button = tk.Button(new_row_frame, text="Browse", font=("Helvetica", 12, "bold"), fg="white", bg="#4CAF50", width=12, height=1, command=new_browse_file, relief="flat", bd=0)
     new_browse_button.pack(side="left", padx=5)
 
+    # "Folder" Button: select every file in a folder
+    def browse_folder():
+        folder = filedialog.askdirectory(title="Select a Folder")
+        if folder:
+            file_paths = sorted(os.path.join(folder, name) for name in os.listdir(folder) if os.path.isfile(os.path.join(folder, name)))
+            set_selected_files(file_paths)
+
+    folder_button = tk.Button(new_row_frame, text="Folder", font=("Helvetica", 12, "bold"), fg="white", bg="#4CAF50", width=12, height=1, command=browse_folder, relief="flat", bd=0)
+    folder_button.pack(side="left", padx=5)
+
     # "Import" Button in the same row as "Browse"
+    # Files are uploaded by a pool of IMPORT_WORKERS threads; the button stays disabled until the batch finishes
     def import_action():
-        file_path = new_textbox_entry.get().strip()
+        file_paths = list(dict.fromkeys(path.strip() for path in new_textbox_entry.get().split(";") if path.strip()))
         name_job = combobox.get().strip()  # Get the selected value from the combobox
-        if file_path and name_job:  # Ensure both file path and combobox value are provided
-            # Use threading to avoid freezing the GUI
-            def on_import_success():
-                load_file_data()  # Refresh the table data after successful import
-                # messagebox.showinfo("Success", "File imported and data refreshed successfully!")
+        if file_paths and name_job:  # Ensure both file path and combobox value are provided
+            missing = [path for path in file_paths if not os.path.isfile(path)]
+            if missing:
+                messagebox.showwarning("Input Error", "File not found:\n" + "\n".join(missing[:10]))
+                return
+
+            import_button["state"] = "disabled"
+            total_bytes = sum(os.path.getsize(path) for path in file_paths)
+            done_bytes = {}  # Uploaded bytes per file
+            done_lock = threading.Lock()
+            start = time.perf_counter()
+
+            # One status row per file
+            status_table.delete(*status_table.get_children())
+            for path in file_paths:
+                status_table.insert("", "end", iid=path, values=(os.path.basename(path), "Queued", "", f"{os.path.getsize(path) / (1024 * 1024):,.1f}", ""))
+            progress_bar["maximum"] = max(total_bytes, 1)
+            progress_bar["value"] = 0
+            throughput_label["text"] = ""
+            instrument.reset()
+
+            # Show aggregate progress and throughput over all files
+            def show_upload_progress(uploaded_bytes, seconds):
+                progress_bar["value"] = uploaded_bytes
+                if seconds > 0:
+                    throughput_label["text"] = f"{uploaded_bytes / seconds / (1024 * 1024):,.1f} MB/s"
+
+            def upload_progress(file_path, file_done_bytes, file_total_bytes):
+                with done_lock:
+                    first_chunk = file_path not in done_bytes
+                    done_bytes[file_path] = file_done_bytes
+                    uploaded_bytes = sum(done_bytes.values())
+                if first_chunk and file_done_bytes < file_total_bytes:
+                    uievents.post(status_table.set, file_path, "Status", "Uploading")
+                uievents.post_latest(progress_bar, show_upload_progress, uploaded_bytes, time.perf_counter() - start)
+
+            # Show each file's result in its status row
+            def show_result(result):
+                status_table.item(result["file"], values=(
+                    os.path.basename(result["file"]),
+                    result["status"].replace("_", " ").capitalize(),
+                    result["message"],
+                    f"{result['bytes'] / (1024 * 1024):,.1f}",
+                    f"{result['seconds']:,.1f}",
+                ), tags=(result["level"],))
+
+            def on_result(result):
+                with done_lock:
+                    done_bytes[result["file"]] = result["bytes"]
+                    uploaded_bytes = sum(done_bytes.values())
+                uievents.post(show_result, result)
+                uievents.post_latest(progress_bar, show_upload_progress, uploaded_bytes, time.perf_counter() - start)
+                uievents.post_latest(stats_table, show_stage_stats)
+
+            # Refresh the table and report once the batch has finished
+            def on_batch_done(results):
+                import_button["state"] = "normal"
+                stored = [result for result in results if result["status"] in (filestore.STATUS_INSERTED, filestore.STATUS_REPLACED)]
+                if len(results) == 1:
+                    result = results[0]
+                    uievents.show(result["level"], result["title"], result["message"])
+                    if stored:
+                        file_name = os.path.basename(result["file"])
+                        show_file_row((name_job, file_name, os.path.splitext(file_name)[1]))  # Add or update just the imported row
+                    return
+                if stored:
+                    load_file_data()  # Reload the page on screen once for the whole batch
+                problems = [(result["level"], os.path.basename(result["file"]), result["message"]) for result in results if not filestore.import_succeeded(result)]
+                uievents.show_summary("Import", f"Imported {len(stored)} of {len(results)} files.", problems)
 
             def import_thread():
                 try:
-                    # Step 1: Execute the stored procedure to drop temporary tables
-                    engine = create_db_connection()
-                    if engine:
-                        with engine.connect() as connection:
-                            # Call the stored procedure to drop temporary tables
-                            sql_query = text("EXEC [dbo].[spDropTableTemp]")
-                            connection.execute(sql_query)
-                            connection.commit()
-                            # print("Temporary tables dropped successfully.")
-
-                    # Step 2: Insert the file into the database
-                    insert_file_to_db(file_path, name_job)
-
-                    # Step 3: Schedule the callback on the main thread
-                    import_file_window.after(0, on_import_success)
+                    # Temporary tables are dropped once for the whole batch
+                    with instrument.profile("import"):
+                        results = filestore.import_files(file_paths, name_job, drop_temp=True, workers=filestore.import_workers, progress=upload_progress, on_result=on_result)
+                    uievents.post(on_batch_done, results)
+                    uievents.post(show_stage_stats)
                 except Exception as e:
-                    messagebox.showerror("Error", f"Failed to execute stored procedure or import file: {str(e)}")
+                    uievents.post(import_button.config, {"state": "normal"})
+                    uievents.show("error", "Error", f"Failed to execute stored procedure or import file: {str(e)}")
 
             # Start the import process in a separate thread
-            threading.Thread(target=import_thread).start()
+            threading.Thread(target=import_thread, daemon=True).start()
         else:
             messagebox.showwarning("Input Error", "Please select a file and a job option first.")
 
     import_button = tk.Button(new_row_frame, text="Import", font=("Helvetica", 12, "bold"), fg="white", bg="#4CAF50", width=12, height=1, command=import_action, relief="flat", bd=0)
     import_button.pack(side="left", padx=5)
 
+    # Per-file status of the last import batch
+    status_frame = tk.Frame(form_frame, bg="#ffffff")
+    status_frame.pack(fill="x")
+
+    status_scrollbar = ttk.Scrollbar(status_frame, orient="vertical")
+    status_scrollbar.pack(side="right", fill="y")
+
+    status_columns = ("File", "Status", "Message", "MB", "Seconds")
+    status_table = ttk.Treeview(status_frame, columns=status_columns, show="headings", height=4, yscrollcommand=status_scrollbar.set)
+    for col, col_width in zip(status_columns, (200, 100, 450, 70, 70)):
+        status_table.heading(col, text=col, anchor="center")
+        status_table.column(col, width=col_width, stretch=col == "Message", anchor="w")
+    status_table.pack(fill="x", expand=True)
+    status_scrollbar.config(command=status_table.yview)
+
+    status_table.tag_configure("warning", background="#fff3cd")  # Light yellow for warnings
+    status_table.tag_configure("error", background="#ffcccc")  # Light red for errors
+
     # Add a Table (Treeview) with dynamic columns
     table_frame = tk.Frame(form_frame, bg="#ffffff")
     table_frame.pack(fill="both", expand=True, pady=(10, 20))
@@ -268,15 +260,38 @@ def open_import_file_form():
     table.tag_configure("oddrow", background="#ffffff")   # White for odd rows
     table.tag_configure("placeholder", background="#ffcccc")  # Light red for placeholder rows
 
-    # Function to load data from tblFile into the table
-    def load_file_data():
+    # First and last NameFile of the page on screen (keys for the next/previous page)
+    page = {"first": None, "last": None, "has_previous": False, "has_next": False}
+
+    # Function to load one page of tblFile into the table
+    # direction: "first", "previous", "next", "last", "reload" (the page currently shown)
+    # or "at" (the page starting at key)
+    def load_file_data(direction="reload", key=None):
         try:
-            # Fetch column names and data from the database
-            columns, file_data = fetch_file_data()
+            # Fetch column names and the requested page from the database
+            if direction == "next":
+                columns, file_data, has_previous, has_next = fetch_file_data(page["last"])
+            elif direction == "previous":
+                columns, file_data, has_previous, has_next = fetch_file_data(page["first"], backward=True)
+            elif direction == "last":
+                columns, file_data, has_previous, has_next = fetch_file_data(backward=True)
+            elif direction == "at":
+                columns, file_data, has_previous, has_next = fetch_file_data(key, inclusive=True)
+            elif direction == "reload" and page["first"] is not None:
+                columns, file_data, has_previous, has_next = fetch_file_data(page["first"], inclusive=True)
+            else:
+                columns, file_data, has_previous, has_next = fetch_file_data()
+
+            # A short page at either end (e.g. rows were deleted) is refilled from the start or the end
+            if not file_data and direction == "reload" and page["first"] is not None:
+                columns, file_data, has_previous, has_next = fetch_file_data(backward=True)
+            elif len(file_data) < filestore.page_size and direction == "previous":
+                columns, file_data, has_previous, has_next = fetch_file_data()
+
+            page["has_previous"], page["has_next"] = has_previous, has_next
 
             # Clear existing data in the table
-            for row in table.get_children():
-                table.delete(row)
+            table.delete(*table.get_children())
 
             # Clear existing columns in the table
             table["columns"] = columns
@@ -288,21 +303,98 @@ def open_import_file_form():
             if len(file_data) == 0:
                 table.insert("", "end", values=["No data found"] * len(columns), tags=("placeholder",))
             else:
-                # Insert data into the table
+                # Insert data into the table; rows are keyed by NameFile so single rows can be updated later
                 for i, row in enumerate(file_data):
                     tag = "evenrow" if i % 2 == 0 else "oddrow"  # Alternating row colors
-                    table.insert("", "end", values=row, tags=(tag,))
+                    table.insert("", "end", iid=row[1], values=row, tags=(tag,))
+
+                # Adjust column widths from a sample of the fetched rows
+                for col, width in zip(columns, estimate_column_widths(columns, file_data)):
+                    table.column(col, width=width)
 
-                # Dynamically adjust column widths based on content
-                for col in columns:
-                    max_width = max([len(str(table.set(item, col))) for item in table.get_children()] + [len(col)]) * 10
-                    table.column(col, width=max_width)
+            update_pager()
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load file data: {str(e)}")
 
+    # Function to refresh the page keys, paging buttons and page label from the rows on screen
+    def update_pager():
+        names = [item for item in table.get_children() if "placeholder" not in table.item(item, "tags")]
+        page["first"] = names[0] if names else None
+        page["last"] = names[-1] if names else None
+        for button, enabled in ((first_page_button, page["has_previous"]), (previous_page_button, page["has_previous"]), (next_page_button, page["has_next"]), (last_page_button, page["has_next"])):
+            button["state"] = "normal" if enabled else "disabled"
+        page_label["text"] = f"{page['first']} - {page['last']}" if names else ""
+
+    # Function to show one imported row without reloading the table
+    # The row is updated in place or inserted in NameFile order when it belongs to the page on screen;
+    # otherwise the page starting at the new row is loaded.
+    # Names are compared case-insensitively like the database's default collation.
+    def show_file_row(row):
+        try:
+            name = row[1]
+            if table.exists(name):
+                table.item(name, values=row)
+            else:
+                key = name.casefold()
+                first = page["first"].casefold() if page["first"] is not None else None
+                last = page["last"].casefold() if page["last"] is not None else None
+                on_page = (
+                    first is None
+                    or (first <= key <= last)
+                    or (key < first and not page["has_previous"])
+                    or (key > last and not page["has_next"])
+                )
+                if not on_page:
+                    load_file_data("at", name)
+                    table.selection_set(name)
+                    table.see(name)
+                    return
+
+                # Drop the "No data found" placeholder
+                for item in table.get_children():
+                    if "placeholder" in table.item(item, "tags"):
+                        table.delete(item)
+
+                names = table.get_children()
+                position = next((i for i, item in enumerate(names) if item.casefold() > key), len(names))
+                table.insert("", position, iid=name, values=row)
+
+                # Keep the page at its size; the row pushed off the end starts the next page
+                names = table.get_children()
+                if len(names) > filestore.page_size:
+                    table.delete(names[-1])
+                    page["has_next"] = True
+
+                # Re-apply alternating row colors from the new row down
+                for i, item in enumerate(table.get_children()[position:], start=position):
+                    table.item(item, tags=("evenrow" if i % 2 == 0 else "oddrow",))
+                update_pager()
+
+            table.selection_set(name)
+            table.see(name)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to show imported file: {str(e)}")
+
+    # Paging buttons below the table
+    pager_frame = tk.Frame(form_frame, bg="#ffffff")
+    pager_frame.pack(fill="x")
+
+    first_page_button = tk.Button(pager_frame, text="<< First", font=("Helvetica", 10, "bold"), fg="white", bg="#607D8B", width=8, command=lambda: load_file_data("first"), relief="flat", bd=0)
+    first_page_button.pack(side="left", padx=2)
+    previous_page_button = tk.Button(pager_frame, text="< Prev", font=("Helvetica", 10, "bold"), fg="white", bg="#607D8B", width=8, command=lambda: load_file_data("previous"), relief="flat", bd=0)
+    previous_page_button.pack(side="left", padx=2)
+    next_page_button = tk.Button(pager_frame, text="Next >", font=("Helvetica", 10, "bold"), fg="white", bg="#607D8B", width=8, command=lambda: load_file_data("next"), relief="flat", bd=0)
+    next_page_button.pack(side="left", padx=2)
+    last_page_button = tk.Button(pager_frame, text="Last >>", font=("Helvetica", 10, "bold"), fg="white", bg="#607D8B", width=8, command=lambda: load_file_data("last"), relief="flat", bd=0)
+    last_page_button.pack(side="left", padx=2)
+
+    # NameFile range of the page on screen
+    page_label = tk.Label(pager_frame, text="", font=("Helvetica", 10), bg="#ffffff")
+    page_label.pack(side="left", padx=10)
+
     # Schedule load_file_data to run after the form is shown
-    import_file_window.after(0, load_file_data)
+    import_file_window.after(0, load_file_data, "first")
 
     # Exit Button Section
     exit_button_frame = tk.Frame(form_frame, bg="#ffffff")
@@ -313,16 +405,12 @@ def open_import_file_form():
         try:
             confirm = messagebox.askyesno("Confirm Reset", "Are you sure you want to reset the table? This will delete all data in tblFile.")
             if confirm:
-                engine = create_db_connection()
-                if engine:
-                    with engine.connect() as connection:
-                        sql_query = text("TRUNCATE TABLE [dbo].[tblFile]")
-                        connection.execute(sql_query)
-                        connection.commit()
-                        messagebox.showinfo("Reset Successful", "The table tblFile has been truncated.")
-                        load_file_data()  # Refresh the table to show it's empty
-                else:
-                    messagebox.showerror("Error", "Failed to connect to the database.")
+                with dbengine.connect() as connection:
+                    sql_query = text("TRUNCATE TABLE [dbo].[tblFile]")
+                    connection.execute(sql_query)
+                    connection.commit()
+                messagebox.showinfo("Reset Successful", "The table tblFile has been truncated.")
+                load_file_data("first")  # Refresh the table to show it's empty
         except Exception as e:
             messagebox.showerror("Error", f"Failed to reset the table: {str(e)}")
 
@@ -339,142 +427,104 @@ def open_import_file_form():
     progress_bar = ttk.Progressbar(progress_frame, orient="horizontal", length=400, mode="determinate")
     progress_bar.pack(side="left", padx=5)
 
+    # Rows/s and MB/s readout for Gen File
+    throughput_label = tk.Label(progress_frame, text="", font=("Helvetica", 12), bg="#ffffff")
+    throughput_label.pack(side="left", padx=5)
+
+    # Time, calls, rows, MB and SQL round trips per stage of the last import batch or Gen File run (see instrument)
+    stats_frame = tk.Frame(form_frame, bg="#ffffff")
+    stats_frame.pack(fill="x")
+
+    stats_columns = ("Stage", "Seconds", "Calls", "Rows", "MB", "Round trips")
+    stats_table = ttk.Treeview(stats_frame, columns=stats_columns, show="headings", height=5)
+    for col, col_width in zip(stats_columns, (120, 90, 70, 110, 80, 90)):
+        stats_table.heading(col, text=col, anchor="center")
+        stats_table.column(col, width=col_width, stretch=False, anchor="w" if col == "Stage" else "e")
+    stats_table.pack(side="left")
+
+    # Function to show the current stage totals in the stats table
+    def show_stage_stats():
+        stats_table.delete(*stats_table.get_children())
+        for row in instrument.stage_rows():
+            stats_table.insert("", "end", values=row)
+
     # "Gen File" Button
     def gen_file_action():
         try:
-            # Fetch data from the tblFile table
-            columns, file_data = fetch_file_data()
+            # List the files in the tblFile table (blobs are streamed later by process_files)
+            files = filestore.list_complete_files()
 
             # Check if the table is empty
-            if len(file_data) == 0:
+            if len(files) == 0:
                 messagebox.showwarning("No Data", "The table tblFile is empty. No data to generate.")
                 return  # Stop further processing if the table is empty
 
             # Reset progress bar
             progress_bar["value"] = 0
-            progress_bar["maximum"] = len(file_data)
+            progress_bar["maximum"] = len(files)
+            throughput_label["text"] = ""
+
+            # Start a fresh rows/s and stage report for this run
+            bulkload.reset_stats()
+            instrument.reset()
+            show_stage_stats()
 
-            # Use threading to avoid freezing the GUI
-            threading.Thread(target=process_files, args=(file_data,)).start()
+            # Use threading to avoid freezing the GUI; one run at a time
+            gen_file_button["state"] = "disabled"
+            threading.Thread(target=process_files, args=(files,)).start()
         except Exception as e:
+            gen_file_button["state"] = "normal"
             messagebox.showerror("Error", f"Failed to generate file: {str(e)}")
 
-    def process_files(file_data):
-        # Loop through each row in the file_data
-        for index, row in enumerate(file_data):
-            # Extract data from the row
-            name_job, name_file, type_file = row
-
-            # Query the database to fetch TypeFile and binDataFile for the current NameJob
-            engine = create_db_connection()
-            if engine:
-                with engine.connect() as connection:
-                    sql_query = text("SELECT TypeFile, binDataFile FROM [dbo].[tblFile] WHERE NameFile = :namefile")
-                    result = connection.execute(sql_query, {"namefile": name_file}).fetchone()
-
-                    if result:
-                        db_type_file, bin_data_file = result  # Fetch TypeFile and binDataFile from the database
-
-                        # Replace "." with an empty string in db_type_file
-                        db_type_file = db_type_file.replace(".", "")
-
-                        # Check the file type and perform actions
-                        if db_type_file.lower() == "xml":
-                            # Action for XML files
-                            try:
-                                xml_data = io.BytesIO(bin_data_file)
-                                ns = {"doc": "urn:schemas-microsoft-com:office:spreadsheet"}
-                                tree = ET.parse(xml_data)
-                                root = tree.getroot()
-                                data = []
-                                for i, node in enumerate(root.findall('.//doc:Row', ns)):
-                                    row_data = {}
-                                    cells = node.findall('doc:Cell', ns)
-                                    for j, cell in enumerate(cells):
-                                        data_node = cell.find('doc:Data', ns)
-                                        row_data[f'{j + 1}'] = data_node.text if data_node is not None else None
-                                    row_data[f'{len(cells) + 1}'] = name_file
-                                    data.append(row_data)
-                                dfx = pd.DataFrame(data)
-                                if not dfx.empty:
-                                    table_name = f'tblImport{dbwh}_{index}_xml'.replace('-', '').lower()
-                                    dfx.to_sql(table_name, con=engine, if_exists='replace', index=False)
-                            except ET.ParseError as e:
-                                messagebox.showerror("Error", f"Error parsing XML file '{name_file}': {e}")
-                            except Exception as e:
-                                messagebox.showerror("Error", f"Error inserting into the database for file '{name_file}': {e}")
-
-                        elif db_type_file.lower() == "xlsx":
-                            # Action for XLSX files
-                            try:
-                                xlsx_data = io.BytesIO(bin_data_file)
-                                excel_file = pd.ExcelFile(xlsx_data, engine='openpyxl')
-                                all_sheets = excel_file.sheet_names
-                                for sheet_index in range(len(all_sheets)):
-                                    df_sheet = excel_file.parse(sheet_index, header=None) #=None  header=0
-                                    df_sheet['name_file'] = name_file
-                                    df_sheet.columns = [f'{i}' for i in range(len(df_sheet.columns))]
-                                    table_name = f'tblImportExcel{dbwh}_{sheet_index}_xlsx'.replace("-", "").lower()
-                                    try:
-                                        with engine.begin():
-                                            df_sheet.to_sql(table_name, con=engine, if_exists='replace', index=False)
-                                    except Exception as e:
-                                        messagebox.showerror("Error", f"Failed to save data from sheet index {sheet_index} to database: {e}")
-                            except Exception as e:
-                                messagebox.showerror("Error", f"Failed to process XLSX file: {str(e)}")
-
-                        elif db_type_file.lower() == "csv":
-                            # Action for CSV files
-                            try:
-                                csv_data = io.BytesIO(bin_data_file)
-                                sample = csv_data.read(1024)
-                                csv_data.seek(0)
-
-                                # Check the delimiter
-                                if b"|" in sample:
-                                    delimiter = "|"
-                                    table_prefix = "Pipe"
-                                elif b"," in sample:
-                                    delimiter = ","
-                                    table_prefix = "Comma"
-                                else:
-                                    messagebox.showwarning("Delimiter Error", f"Unsupported delimiter in CSV file: {name_file}")
-                                    continue  # Skip this file
-
-                                # Read the CSV file using pandas
-                                df_csv = pd.read_csv(csv_data, delimiter=delimiter, encoding="iso8859_11", header=None)
-
-                                # Add the 'name_file' column to the DataFrame
-                                df_csv['name_file'] = name_file
-
-                                # Rename columns dynamically as [0], [1], [2], ..., [N]
-                                df_csv.columns = [f'{i}' for i in range(len(df_csv.columns))]
-
-                                # Clean up table name (replace spaces with underscores and convert to lowercase)
-                                table_name = f'tblImport{table_prefix}{dbwh}_{index}_csv'.replace("-", "").lower()
-
-                                try:
-                                    with engine.begin():
-                                        df_csv.to_sql(table_name, con=engine, if_exists='replace', index=False)
-                                        # messagebox.showinfo("Success", f"CSV data for {name_file} imported into table '{table_name}' successfully!")
-                                except Exception as e:
-                                    messagebox.showerror("Error", f"Failed to save CSV data to database: {e}")
-                            except Exception as e:
-                                messagebox.showerror("Error", f"Failed to process CSV file: {str(e)}")
-
-                        else:
-                            # Action for other file types
-                            messagebox.showinfo("File Type", f"Unsupported file type: {db_type_file} for job: {name_job}")
-                    else:
-                        messagebox.showwarning("No Data", f"No data found for file: {name_file}")
-            else:
-                messagebox.showerror("Error", "Failed to connect to the database.")
-
-            # Update progress bar
-            progress_bar["value"] = index + 1
-            import_file_window.update_idletasks()  # Refresh the GUI
-
-        messagebox.showinfo("Success", "All files processed successfully!")
+    # Runs on a worker thread: widget updates are posted to the main thread and problems are
+    # collected into one summary instead of stopping the run with a dialog per file
+    def process_files(files):
+        try:
+            run_gen_file(files)
+        except Exception as e:
+            # e.g. reading tblFileLoad failed before the first file started
+            uievents.post(show_stage_stats)
+            uievents.post(reset_progress)
+            uievents.show("error", "Error", f"Failed to generate file: {str(e)}")
+        finally:
+            uievents.post(gen_file_button.config, {"state": "normal"})
+
+    # Function to clear the progress bar and throughput after a run that could not finish
+    def reset_progress():
+        progress_bar["value"] = 0
+        throughput_label["text"] = ""
+
+    # Function to run Gen File over the listed files and show its summary (runs on the worker thread)
+    def run_gen_file(files):
+        import genfile  # Parallel Gen File pipeline
+        problems = []
+
+        def report(level, title, message):
+            problems.append((level, title, message))
+
+        # Update progress bar and stage totals as each file finishes
+        def show_progress(done_files):
+            progress_bar["value"] = done_files
+
+        def update_progress(done_files):
+            uievents.post_latest(progress_bar, show_progress, done_files)
+            uievents.post_latest(stats_table, show_stage_stats)
+
+        # Show running load throughput
+        def show_throughput(rows, source_bytes, seconds):
+            throughput_label["text"] = f"{rows / seconds:,.0f} rows/s | {source_bytes / seconds / (1024 * 1024):,.1f} MB/s"
+
+        def update_throughput(rows, source_bytes, seconds):
+            if seconds > 0:
+                uievents.post_latest(throughput_label, show_throughput, rows, source_bytes, seconds)
+
+        # Parse on a process pool and load on a thread pool (see genfile.run_gen_file)
+        with instrument.profile("gen_file"):
+            summary = genfile.run_gen_file(dbwh, progress=update_progress, report=report, throughput=update_throughput, files=files)
+        uievents.post(show_stage_stats)
+
+        message = "All files processed successfully!" if not problems else "Gen File finished with problems."
+        uievents.show_summary("Gen File", f"{message}\n\nUnchanged files skipped: {summary['skipped']}\n{bulkload.format_stats()}", problems)
 
     gen_file_button = tk.Button(exit_button_frame, text="Gen File", font=("Helvetica", 12, "bold"), fg="white", bg="#9C27B0", width=12, height=1, command=gen_file_action, relief="flat", bd=0)
     gen_file_button.pack(side="left", padx=5)
@@ -502,5 +552,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Failed to load icon: {e}")
 
+    uievents.start(root)  # Run events posted by worker threads on this thread
     open_import_file_form()  # Open the Import File form
     root.mainloop()
\ No newline at end of file
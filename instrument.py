@@ -0,0 +1,225 @@
+import contextlib
+import json
+import os
+import threading  # Import threading module
+import time
+import config  # Loads .env once for every module
+
+# Per-stage timings of import and Gen File, per file: seconds, calls, rows, bytes and SQL round trips.
+# Stages nest (a DataFrame built while parsing); each stage counts only its own time, not its inner stages'.
+# Example: with instrument.stage("load", name_file) as load: ...; load["rows"] = len(df)
+
+# Instrumentation settings (override in .env)
+stats_log = os.getenv("STATS_LOG", "")  # JSON-lines file that receives one line per file and per run; empty: off
+profile_mode = os.getenv("PROFILE_MODE", "").strip().lower()  # "cprofile" or "tracemalloc" captures each run; empty: off
+profile_dir = os.getenv("PROFILE_DIR", "profiles")  # Folder for the capture files
+
+# Stages in the order they happen, for display; unknown stages are listed after these
+STAGES = ("drop_temp", "hash", "upload", "fetch", "parse", "frame", "type", "load", "record")
+
+# cProfile, pstats and tracemalloc are imported by the first capture, not at startup
+
+# Lines of the text report written next to a capture
+PROFILE_REPORT_LINES = 40
+
+_lock = threading.Lock()
+_files = {}  # file name -> {stage: counters}
+_log_lock = threading.Lock()
+_local = threading.local()  # Per thread: "stack" of open stages and an optional "capture" dict
+
+_profile_lock = threading.Lock()
+_profile = {"name": None, "profilers": []}  # Capture in progress and the cProfile profilers of its threads
+
+# Function to create an empty set of counters for one stage of one file
+def new_counters():
+    return {"seconds": 0.0, "calls": 0, "rows": 0, "bytes": 0, "round_trips": 0}
+
+# Function to add counters to {file: {stage: counters}}
+def add_counters(files, file, stage_name, values):
+    counters = files.setdefault(file or "", {}).setdefault(stage_name, new_counters())
+    for key, value in values.items():
+        counters[key] += value
+
+# Function to record counters for a stage, into the thread's capture when one is open
+def add(file, stage_name, **values):
+    capture = getattr(_local, "capture", None)
+    if capture is not None:
+        add_counters(capture, file, stage_name, values)
+        return
+    with _lock:
+        add_counters(_files, file, stage_name, values)
+
+# Function to time one stage of one file; file defaults to the enclosing stage's file
+# Yields a dict whose "rows", "bytes" and "file" may be set before the block ends
+@contextlib.contextmanager
+def stage(name, file=None, rows=0, bytes=0):
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    frame = {"file": file if file is not None else (parent["file"] if parent else None), "rows": rows, "bytes": bytes, "inner": 0.0, "round_trips": 0}
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield frame
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        if parent is not None:
+            parent["inner"] += seconds
+        add(frame["file"], name, seconds=seconds - frame["inner"], calls=1, rows=frame["rows"], bytes=frame["bytes"], round_trips=frame["round_trips"])
+
+# Function to count one SQL statement sent to the database against the stage open on this thread
+# Called by dbengine for every cursor execute
+def round_trip():
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1]["round_trips"] += 1
+
+# Function to collect the stages recorded on this thread into a dict instead of the shared totals
+# Used in Gen File worker processes; the parent adds the dict with merge()
+@contextlib.contextmanager
+def capture():
+    previous = getattr(_local, "capture", None)
+    _local.capture = {}
+    try:
+        yield _local.capture
+    finally:
+        _local.capture = previous
+
+# Function to add stages captured in another process to the shared totals
+def merge(captured):
+    with _lock:
+        for file, stages in captured.items():
+            for stage_name, values in stages.items():
+                add_counters(_files, file, stage_name, values)
+
+# Function to clear every recorded stage (e.g. at the start of an import batch or Gen File run)
+def reset():
+    with _lock:
+        _files.clear()
+
+# Function to return the stages of one file: {stage: counters}
+def file_stages(file):
+    with _lock:
+        return {stage_name: dict(counters) for stage_name, counters in _files.get(file, {}).items()}
+
+# Function to return every stage summed over all files: {stage: counters}, in STAGES order
+def stage_totals():
+    totals = {}
+    with _lock:
+        for stages in _files.values():
+            for stage_name, counters in stages.items():
+                add_counters(totals, "", stage_name, counters)
+    totals = totals.get("", {})
+    order = list(STAGES) + sorted(stage_name for stage_name in totals if stage_name not in STAGES)
+    return {stage_name: totals[stage_name] for stage_name in order if stage_name in totals}
+
+# Function to return the stage totals as display rows: (stage, seconds, calls, rows, MB, round trips)
+def stage_rows():
+    return [
+        (stage_name, f"{counters['seconds']:,.2f}", f"{counters['calls']:,}", f"{counters['rows']:,}", f"{counters['bytes'] / (1024 * 1024):,.1f}", f"{counters['round_trips']:,}")
+        for stage_name, counters in stage_totals().items()
+    ]
+
+# Function to append one JSON line to STATS_LOG (does nothing when it is not set)
+def log(event, **fields):
+    if not stats_log:
+        return
+    line = json.dumps({"time": time.strftime("%Y-%m-%d %H:%M:%S"), "event": event, **fields}, default=str, ensure_ascii=False)
+    try:
+        with _log_lock, open(stats_log, "a", encoding="utf-8") as log_file:
+            log_file.write(line + "\n")
+    except OSError:
+        pass  # Timing must never stop a load
+
+# Function to log one finished file with its stages
+def log_file(event, file, **fields):
+    if stats_log:
+        log(event, file=file, stages=file_stages(file), **fields)
+
+# Function to capture a cProfile or tracemalloc profile of a run (PROFILE_MODE); nested captures are ignored
+# Threads of the run join the cProfile capture with profile_thread()
+@contextlib.contextmanager
+def profile(name):
+    with _profile_lock:
+        if profile_mode not in ("cprofile", "tracemalloc") or _profile["name"] is not None:
+            started = False
+        else:
+            started = True
+            _profile["name"] = name
+            _profile["profilers"] = []
+    if not started:
+        yield
+        return
+
+    if profile_mode == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start(25)
+    try:
+        with profile_thread():
+            yield
+    finally:
+        try:
+            path = write_profile(name)
+            log("profile", name=name, mode=profile_mode, path=path)
+        except Exception:
+            pass  # A capture that cannot be written must not fail the run
+        finally:
+            if profile_mode == "tracemalloc":
+                import tracemalloc
+                tracemalloc.stop()
+            with _profile_lock:
+                _profile["name"] = None
+                _profile["profilers"] = []
+
+# Function to profile the current thread while a cProfile capture is running (once per thread; nested calls do nothing)
+@contextlib.contextmanager
+def profile_thread():
+    with _profile_lock:
+        active = profile_mode == "cprofile" and _profile["name"] is not None
+    if not active or getattr(_local, "profiling", False):
+        yield
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    _local.profiling = True
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _local.profiling = False
+        with _profile_lock:
+            _profile["profilers"].append(profiler)
+
+# Function to write the capture of the run that is ending and return the path of its data file
+# cprofile: <name>_<time>.prof (for pstats or snakeviz) and a .txt of the top functions by cumulative time;
+# tracemalloc: a .txt of the peak and the lines holding the most memory
+def write_profile(name):
+    import io
+    import pstats
+    import tracemalloc
+    os.makedirs(profile_dir, exist_ok=True)
+    base = os.path.join(profile_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}")
+    if profile_mode == "cprofile":
+        with _profile_lock:
+            profilers = list(_profile["profilers"])
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.dump_stats(base + ".prof")
+        report = io.StringIO()
+        pstats.Stats(base + ".prof", stream=report).sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+        with open(base + ".txt", "w", encoding="utf-8") as report_file:
+            report_file.write(report.getvalue())
+        return base + ".prof"
+
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"Peak traced memory: {peak / (1024 * 1024):,.1f} MB, still held: {current / (1024 * 1024):,.1f} MB", ""]
+    lines += [str(statistic) for statistic in tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_REPORT_LINES]]
+    with open(base + ".txt", "w", encoding="utf-8") as report_file:
+        report_file.write("\n".join(lines) + "\n")
+    return base + ".txt"
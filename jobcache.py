@@ -0,0 +1,123 @@
+import json
+import os
+import threading  # Import threading module
+import time
+from sqlalchemy import text
+import config  # Loads .env once for every module
+import dbengine  # Shared, pooled database engine
+
+# Seconds before cached job metadata is read again (override in .env)
+cache_ttl = float(os.getenv("JOB_CACHE_TTL_SECONDS", "3600"))
+
+# Cached job metadata; the job list changes rarely, so it is read once and shared by the whole process
+_lock = threading.Lock()
+_cache = {
+    "names": None,  # Job names for the combobox, in spFileJob 'showFile' order
+    "extensions": None,  # xNameJob -> expected extension with the dot, lower case (".csv")
+    "schemas": None,  # xNameJob -> {column: type} from tblFileJob.xSchema, for typed Gen File loads
+    "load_options": None,  # xNameJob -> {"mode", "keys", "table"} from xLoadMode, xKeyColumns and xTableName
+    "loaded_at": 0.0,
+}
+
+# Every column is selected because xSchema (sql/004) and the load-mode columns (sql/005) are optional
+JOBS_SQL = "SELECT * FROM [dbo].[tblFileJob] WHERE xFile IS NOT NULL"
+
+# Load options of a job without xLoadMode
+DEFAULT_LOAD_OPTIONS = {"mode": "replace", "keys": [], "table": None}
+
+# Function to read the job list and every job's expected file type, schema and load options from the database
+def load():
+    with dbengine.connect() as connection:
+        names = [row[0] for row in connection.execute(text("EXEC [dbo].[spFileJob] 'showFile'")).fetchall()]
+        extensions = {}
+        schemas = {}
+        load_options = {}
+        for row in connection.execute(text(JOBS_SQL)).mappings():
+            name_job = row["xNameJob"]
+            extensions[name_job] = f".{row['xFile'].lower()}"
+            if row.get("xSchema"):
+                try:
+                    schemas[name_job] = {str(column): str(spec).lower() for column, spec in json.loads(row["xSchema"]).items()}
+                except (ValueError, AttributeError):
+                    pass  # Not a JSON object: the job loads with inferred types
+            if row.get("xLoadMode") or row.get("xTableName"):
+                load_options[name_job] = {
+                    "mode": (row.get("xLoadMode") or "replace").strip().lower(),
+                    "keys": [key.strip() for key in (row.get("xKeyColumns") or "").split(",") if key.strip()],
+                    "table": (row.get("xTableName") or "").strip() or None,
+                }
+    with _lock:
+        _cache["names"] = names
+        _cache["extensions"] = extensions
+        _cache["schemas"] = schemas
+        _cache["load_options"] = load_options
+        _cache["loaded_at"] = time.monotonic()
+    return names, extensions
+
+# Function to fill the cache without the database (offline tools such as benchmark.py)
+# extensions maps xNameJob -> expected extension with the dot; schemas and load_options as read by load()
+def prime(extensions, schemas=None, load_options=None):
+    with _lock:
+        _cache["names"] = sorted(extensions)
+        _cache["extensions"] = dict(extensions)
+        _cache["schemas"] = dict(schemas or {})
+        _cache["load_options"] = dict(load_options or {})
+        _cache["loaded_at"] = time.monotonic()
+
+# Function to return (names, extensions), reading them again when missing or older than the TTL
+def get():
+    with _lock:
+        if _cache["names"] is not None and time.monotonic() - _cache["loaded_at"] < cache_ttl:
+            return _cache["names"], _cache["extensions"]
+    return load()
+
+# Function to return the cached job names without touching the database (None until loaded)
+def cached_names():
+    with _lock:
+        return _cache["names"]
+
+# Function to return the job names for the combobox
+def job_names():
+    return get()[0]
+
+# Function to return every job with its expected extension, e.g. {"Sales": ".csv"}
+def job_extensions():
+    return dict(get()[1])
+
+# Function to return the expected extension of a job, or None for an unknown job
+# An unknown job triggers one fresh read, in case it was added since the cache was loaded
+def expected_extension(name_job):
+    extensions = get()[1]
+    if name_job not in extensions:
+        extensions = load()[1]
+    return extensions.get(name_job)
+
+# Function to return a job's column types ({"0": "int", "3": "date", ...}), or None when it has no schema
+def job_schema(name_job):
+    get()
+    with _lock:
+        return (_cache["schemas"] or {}).get(name_job)
+
+# Function to return a job's load options: {"mode": "replace" | "append" | "merge", "keys": [column, ...], "table": name or None}
+def job_load_options(name_job):
+    get()
+    with _lock:
+        return dict((_cache["load_options"] or {}).get(name_job, DEFAULT_LOAD_OPTIONS))
+
+# Function to drop the cached metadata so the next lookup reads it again
+def invalidate():
+    with _lock:
+        _cache["names"] = None
+        _cache["extensions"] = None
+        _cache["schemas"] = None
+        _cache["load_options"] = None
+        _cache["loaded_at"] = 0.0
+
+# Function to load the cache on a background thread (e.g. at startup, while the user logs in)
+def warm_up():
+    def run():
+        try:
+            get()
+        except Exception:
+            pass  # The first real lookup reports the error
+    threading.Thread(target=run, daemon=True).start()
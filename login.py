@@ -1,49 +1,55 @@
+import startuptiming  # Startup milestones (STARTUP_TIMING=1); imported first to time everything after it
 import tkinter as tk
-from tkinter import messagebox
-from dotenv import load_dotenv
-import os
-from sqlalchemy import create_engine, text
-import mainmenu  # Import the mainmenu module
 import threading  # Import the threading module
+import multiprocessing  # Gen File parses on a process pool
+import config  # Loads .env once for every module
+import uievents  # Main-thread dispatcher for worker threads
 
-# Load environment variables from .env file
-load_dotenv()
+# Database, pandas and the other windows are imported on first use so the login window opens quickly
+# (SQLAlchemy is loaded by warm_up_database while the user types)
 
-# Retrieve database values from environment variables
-server = os.getenv("DB_SERVER")
-database = os.getenv("DB_DATABASE")
-username = os.getenv("DB_USERNAME")
-password = os.getenv("DB_PASSWORD")
-driver = os.getenv("DB_DRIVER")
-dbwh = os.getenv("DB_WH")  # Database warehouse identifier
+# Retrieve database values from environment variables (connection settings live in dbengine.py)
+dbwh = config.dbwh  # Database warehouse identifier
+
+# Function to build the database engine and open a pooled connection in the background
+def warm_up_database():
+    import dbengine  # Shared, pooled database engine
+    dbengine.warm_up()
+    startuptiming.mark("database connection ready")
 
 # Function to handle the login action
 def login_action():
     user = entry_username.get()
     passw = entry_password.get()
 
+    # Posted to the Tk main thread by perform_login, which runs on a worker thread
+    def open_main_menu():
+        import mainmenu  # Import the mainmenu module
+        root.withdraw()  # Hide the login window
+        mainmenu.open_main_menu()  # Open the main menu from mainmenu.py
+        startuptiming.mark("main menu shown")
+
     def perform_login():
         try:
-            # Create the connection engine
-            engine = create_engine(
-                f"mssql+pyodbc:///?odbc_connect=DRIVER={driver};SERVER={server};DATABASE={database};UID={username};PWD={password}"
-            )
+            from sqlalchemy import text
+            import dbengine  # Shared, pooled database engine
+            import jobcache  # Cached tblFileJob metadata
 
             # Define the SQL query to call the stored procedure
-            sql_query = text(f"EXEC [dbo].[spUsers] 'myLogin','{user}', '{passw}'")
+            sql_query = text("EXEC [dbo].[spUsers] 'myLogin', :user, :passw")
 
-            # Execute the stored procedure
-            with engine.connect() as conn:
-                user_data = conn.execute(sql_query).fetchone()
+            # Execute the stored procedure on a pooled connection (the same engine is reused by the main menu)
+            with dbengine.connect() as conn:
+                user_data = conn.execute(sql_query, {"user": user, "passw": passw}).fetchone()
 
             if not user_data:
-                messagebox.showerror("Login Failed", "Invalid Username or Password")
+                uievents.show("error", "Login Failed", "Invalid Username or Password")
             else:
-                root.withdraw()  # Hide the login window
-                mainmenu.open_main_menu()  # Open the main menu from mainmenu.py
+                jobcache.warm_up()  # Read the job list while the main menu opens
+                uievents.post(open_main_menu)
 
         except Exception as e:
-            messagebox.showerror("Database Connection Failed", f"Error: {str(e)}")
+            uievents.show("error", "Database Connection Failed", f"Error: {str(e)}")
 
     # Run the login operation in a separate thread
     threading.Thread(target=perform_login).start()
@@ -77,101 +83,114 @@ def set_icon(window):
     except Exception as e:
         print(f"Failed to load icon: {e}")
 
-# Create the main window
-root = tk.Tk()
-root.title(f"Login - {dbwh}")  # Dynamic title with database warehouse identifier
-root.geometry("400x300")  # Initial window size
-root.resizable(False, False)
-
-# Set the application icon for the main window
-set_icon(root)
-
-# Center the window on the screen
-center_window(root, 400, 300)
-
-# Set a background color
-root.configure(bg="#f0f0f0")
-
-# Create a frame for the form (dynamic size)
-form_frame = tk.Frame(root, bg="#ffffff", padx=20, pady=20)
-form_frame.pack(expand=True, fill="both", padx=1, pady=1)  # Dynamic size with padding
-
-# Add a title label
-title_label = tk.Label(
-    form_frame,
-    text="Login",
-    font=("Helvetica", 24, "bold"),
-    fg="#4CAF50",  # Green color for the title
-    bg="#ffffff"
-)
-title_label.pack(pady=(0, 20))
-
-# Username field
-username_frame = tk.Frame(form_frame, bg="#ffffff")
-username_frame.pack(fill="x", pady=(0, 10))
-
-label_username = tk.Label(
-    username_frame,
-    text="Username:",
-    font=("Helvetica", 12),
-    bg="#ffffff"
-)
-label_username.pack(side="left", padx=(0, 10))
-
-entry_username = tk.Entry(
-    username_frame,
-    font=("Helvetica", 12),
-    width=25,
-    bd=1,
-    relief="solid"
-)
-entry_username.pack(side="right", expand=True, fill="x")
-
-# Password field
-password_frame = tk.Frame(form_frame, bg="#ffffff")
-password_frame.pack(fill="x", pady=(0, 10))
-
-label_password = tk.Label(
-    password_frame,
-    text="Password:",
-    font=("Helvetica", 12),
-    bg="#ffffff"
-)
-label_password.pack(side="left", padx=(0, 10))
-
-entry_password = tk.Entry(
-    password_frame,
-    show="*",
-    font=("Helvetica", 12),
-    width=25,
-    bd=1,
-    relief="solid"
-)
-entry_password.pack(side="right", expand=True, fill="x")
-
-# Login Button
-login_button = tk.Button(
-    form_frame,
-    text="Login",
-    font=("Helvetica", 12, "bold"),
-    fg="white",
-    bg="#4CAF50",
-    width=15,
-    height=1,
-    command=login_action,  # Use the new login_action function
-    relief="flat",  # Remove the default button border
-    bd=0  # Remove border
-)
-login_button.pack(pady=(20, 0))
-
-# Set default cursor focus on the username field
-entry_username.focus_set()
-
-# Bind the Enter key to switch focus to the password field
-entry_username.bind("<Return>", focus_password)
-
-# Bind the Enter key in the password field to trigger login
-entry_password.bind("<Return>", login_on_enter)
-
-# Run the application
-root.mainloop()
\ No newline at end of file
+# Guarded so Gen File worker processes can import this module without opening a window
+if __name__ == "__main__":
+    # Let frozen (PyInstaller) Gen File worker processes start without opening another login window
+    multiprocessing.freeze_support()
+
+    # Create the main window
+    root = tk.Tk()
+    root.title(f"Login - {dbwh}")  # Dynamic title with database warehouse identifier
+    root.geometry("400x300")  # Initial window size
+    root.resizable(False, False)
+
+    # Set the application icon for the main window
+    set_icon(root)
+
+    # Center the window on the screen
+    center_window(root, 400, 300)
+
+    # Run events posted by worker threads (login, import, Gen File) on this thread
+    uievents.start(root)
+
+    # Connect to the database while the user types
+    threading.Thread(target=warm_up_database, daemon=True).start()
+    startuptiming.mark("modules imported")
+    root.after(0, startuptiming.mark, "login window shown")
+
+    # Set a background color
+    root.configure(bg="#f0f0f0")
+
+    # Create a frame for the form (dynamic size)
+    form_frame = tk.Frame(root, bg="#ffffff", padx=20, pady=20)
+    form_frame.pack(expand=True, fill="both", padx=1, pady=1)  # Dynamic size with padding
+
+    # Add a title label
+    title_label = tk.Label(
+        form_frame,
+        text="Login",
+        font=("Helvetica", 24, "bold"),
+        fg="#4CAF50",  # Green color for the title
+        bg="#ffffff"
+    )
+    title_label.pack(pady=(0, 20))
+
+    # Username field
+    username_frame = tk.Frame(form_frame, bg="#ffffff")
+    username_frame.pack(fill="x", pady=(0, 10))
+
+    label_username = tk.Label(
+        username_frame,
+        text="Username:",
+        font=("Helvetica", 12),
+        bg="#ffffff"
+    )
+    label_username.pack(side="left", padx=(0, 10))
+
+    entry_username = tk.Entry(
+        username_frame,
+        font=("Helvetica", 12),
+        width=25,
+        bd=1,
+        relief="solid"
+    )
+    entry_username.pack(side="right", expand=True, fill="x")
+
+    # Password field
+    password_frame = tk.Frame(form_frame, bg="#ffffff")
+    password_frame.pack(fill="x", pady=(0, 10))
+
+    label_password = tk.Label(
+        password_frame,
+        text="Password:",
+        font=("Helvetica", 12),
+        bg="#ffffff"
+    )
+    label_password.pack(side="left", padx=(0, 10))
+
+    entry_password = tk.Entry(
+        password_frame,
+        show="*",
+        font=("Helvetica", 12),
+        width=25,
+        bd=1,
+        relief="solid"
+    )
+    entry_password.pack(side="right", expand=True, fill="x")
+
+    # Login Button
+    login_button = tk.Button(
+        form_frame,
+        text="Login",
+        font=("Helvetica", 12, "bold"),
+        fg="white",
+        bg="#4CAF50",
+        width=15,
+        height=1,
+        command=login_action,  # Use the new login_action function
+        relief="flat",  # Remove the default button border
+        bd=0  # Remove border
+    )
+    login_button.pack(pady=(20, 0))
+
+    # Set default cursor focus on the username field
+    entry_username.focus_set()
+
+    # Bind the Enter key to switch focus to the password field
+    entry_username.bind("<Return>", focus_password)
+
+    # Bind the Enter key in the password field to trigger login
+    entry_password.bind("<Return>", login_on_enter)
+
+    # Run the application
+    root.mainloop()
\ No newline at end of file
@@ -1,25 +1,40 @@
 import tkinter as tk
 from tkinter import messagebox
-from dotenv import load_dotenv
-import os
-from importfile import open_import_file_form  # Import the function from importfile.py
-import threading  # Import the threading module
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Retrieve database values from environment variables
-server = os.getenv("DB_SERVER")
-database = os.getenv("DB_DATABASE")
-username = os.getenv("DB_USERNAME")
-password = os.getenv("DB_PASSWORD")
-driver = os.getenv("DB_DRIVER")
-dbwh = os.getenv("DB_WH")  # Database warehouse identifier
+import config  # Loads .env once for every module
+import uievents  # Main-thread dispatcher for worker threads
+
+# importfile, dbengine and jobcache are imported on first use so the menu opens without loading them
+
+# Retrieve database values from environment variables (connection settings live in dbengine.py)
+dbwh = config.dbwh  # Database warehouse identifier
 
 # Function to handle the 'Import File' action
+# Windows must be created on the Tk main thread; the form runs its slow work on worker threads itself
 def import_file():
-    # Run the file import operation in a separate thread
-    threading.Thread(target=open_import_file_form).start()
+    from importfile import open_import_file_form  # Import the function from importfile.py
+    open_import_file_form()
+
+# Function to reload the job list and file types on next use (after tblFileJob was changed)
+def reload_jobs():
+    import jobcache  # Cached tblFileJob metadata
+    jobcache.invalidate()
+    jobcache.warm_up()
+    messagebox.showinfo("Reload Jobs", "The job list will be read again from the database.")
+
+# Function to show the shared connection pool statistics
+def show_connection_stats():
+    import dbengine  # Shared, pooled database engine
+    stats = dbengine.pool_stats()
+    lines = [
+        f"Connections opened: {stats['connects']}",
+        f"Checkouts: {stats['checkouts']}",
+        f"Checkins: {stats['checkins']}",
+        f"Average wait: {stats['wait_avg'] * 1000:.1f} ms",
+        f"Longest wait: {stats['wait_max'] * 1000:.1f} ms",
+    ]
+    if "pool_status" in stats:
+        lines.append(stats["pool_status"])
+    messagebox.showinfo("Connection Stats", "\n".join(lines))
 
 # Function to open the main menu
 def open_main_menu():
@@ -51,6 +66,12 @@ def open_main_menu():
     # Add 'Import File' option in the 'File' menu
     file_menu.add_command(label="Import File", command=import_file)
 
+    # Add 'Reload Jobs' option in the 'File' menu
+    file_menu.add_command(label="Reload Jobs", command=reload_jobs)
+
+    # Add 'Connection Stats' option in the 'File' menu
+    file_menu.add_command(label="Connection Stats", command=show_connection_stats)
+
     # Add the menubar to the main menu window
     main_menu.config(menu=menubar)
 
@@ -82,5 +103,6 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Failed to load icon: {e}")
 
+    uievents.start(root)  # Run events posted by worker threads on this thread
     open_main_menu()  # Open the main menu
     root.mainloop()
\ No newline at end of file
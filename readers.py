@@ -0,0 +1,158 @@
+import re
+import xml.etree.ElementTree as ET
+
+# The readers take a blobstore.Blob: the content is read through blob.open() and blob.view(), never copied whole
+
+# SpreadsheetML (Excel 2003 XML) namespace
+SS_NS = "urn:schemas-microsoft-com:office:spreadsheet"
+SS_TABLE = f"{{{SS_NS}}}Table"
+SS_ROW = f"{{{SS_NS}}}Row"
+SS_CELL = f"{{{SS_NS}}}Cell"
+SS_DATA = f"{{{SS_NS}}}Data"
+SS_INDEX = f"{{{SS_NS}}}Index"
+SS_MERGE_ACROSS = f"{{{SS_NS}}}MergeAcross"
+
+# ss:ExpandedColumnCount is written by Excel on every Table element
+EXPANDED_COLUMN_COUNT = re.compile(rb'ExpandedColumnCount\s*=\s*["\'](\d+)["\']')
+
+# Function to read one Row element into {column_number: text}, honouring ss:Index and ss:MergeAcross
+def read_xml_row(row):
+    values = {}
+    column = 0
+    for cell in row.iter(SS_CELL):
+        index = cell.get(SS_INDEX)
+        column = int(index) if index else column + 1
+        data_node = cell.find(SS_DATA)
+        values[column] = data_node.text if data_node is not None else None
+        column += int(cell.get(SS_MERGE_ACROSS, "0"))
+    return values
+
+# Function to find the widest table in a SpreadsheetML document without building it
+def xml_column_count(blob):
+    counts = [int(count) for count in EXPANDED_COLUMN_COUNT.findall(blob.view())]
+    if counts:
+        return max(counts)
+
+    # No ss:ExpandedColumnCount: scan the rows once
+    width = 0
+    with blob.open() as source:
+        for event, elem in ET.iterparse(source, events=("end",)):
+            if elem.tag == SS_ROW:
+                values = read_xml_row(elem)
+                if values:
+                    width = max(width, max(values))
+                elem.clear()
+    return width
+
+# Function to stream the rows of a SpreadsheetML document as columnar batches
+# Yields (row_count, columns) where columns[k] holds the values of column k + 1 for up to batch_rows rows.
+# Parsed rows are removed from the tree as they are read, so memory stays bounded by one batch.
+# A row with cells beyond ss:ExpandedColumnCount widens the columns while the first batch is read; after
+# that the table's columns are fixed, so such a row raises ValueError instead of losing cells.
+def iter_xml_batches(blob, batch_rows):
+    width = xml_column_count(blob)
+    columns = [[] for _ in range(width)]
+    row_count = 0
+    yielded = False
+    parents = []
+    with blob.open() as source:
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                parents.append(elem)
+                continue
+            parents.pop()
+            if elem.tag == SS_ROW:
+                values = read_xml_row(elem)
+                if values and max(values) > width:
+                    if yielded:
+                        raise ValueError(f"a row has a cell in column {max(values)}, beyond the {width} columns of the rows before it")
+                    columns += [[None] * row_count for _ in range(max(values) - width)]
+                    width = max(values)
+                for k in range(width):
+                    columns[k].append(values.get(k + 1))
+                row_count += 1
+                if parents:
+                    parents[-1].remove(elem)
+                if row_count >= batch_rows:
+                    yield row_count, columns
+                    yielded = True
+                    columns = [[] for _ in range(width)]
+                    row_count = 0
+            elif elem.tag == SS_TABLE:
+                elem.clear()
+    if row_count:
+        yield row_count, columns
+
+# Function to convert an openpyxl cell the way pandas' openpyxl reader does
+def convert_openpyxl_cell(cell):
+    if cell.value is None:
+        return ""
+    elif cell.data_type == "e":  # Error cells (#DIV/0!, #REF!, ...) become NaN
+        return float("nan")
+    elif cell.data_type == "n":
+        value = int(cell.value)
+        if value == cell.value:
+            return value
+        return float(cell.value)
+    return cell.value
+
+# Function to convert a calamine value the way pandas' calamine reader does
+def convert_calamine_value(value):
+    if isinstance(value, float):
+        integer = int(value)
+        if integer == value:
+            return integer
+    return value
+
+# Function to yield each sheet of an XLSX blob as (sheet_width, rows of converted values)
+# openpyxl is used in read-only mode; python-calamine is used when requested and installed.
+# A file-backed blob is opened by path, so neither library holds a second copy of it in memory.
+def iter_xlsx_sheets(blob, engine="auto"):
+    if engine in ("auto", "calamine"):
+        try:
+            from python_calamine import CalamineWorkbook
+        except ImportError:
+            if engine == "calamine":
+                raise
+        else:
+            workbook = CalamineWorkbook.from_path(blob.path) if blob.path is not None else CalamineWorkbook.from_filelike(blob.open())
+            for sheet_name in workbook.sheet_names:
+                sheet = workbook.get_sheet_by_name(sheet_name)
+                rows = sheet.iter_rows() if hasattr(sheet, "iter_rows") else sheet.to_python(skip_empty_area=False)
+                yield None, ([convert_calamine_value(value) for value in row] for row in rows)
+            return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(blob.path if blob.path is not None else blob.open(), read_only=True, data_only=True, keep_links=False)
+    try:
+        for sheet in workbook.worksheets:
+            sheet_width = sheet.max_column  # From the <dimension> tag; may be None
+            sheet.reset_dimensions()
+            yield sheet_width, ([convert_openpyxl_cell(cell) for cell in row] for row in sheet.rows)
+    finally:
+        workbook.close()
+
+# Function to stream one sheet's rows in batches, keeping pandas' header=None trimming rules
+# Trailing empty cells are dropped from each row and trailing empty rows from the sheet.
+# Yields lists of rows; rows are not padded, so the caller decides the width.
+def iter_sheet_batches(rows, batch_rows):
+    batch = []
+    pending_blank = 0  # Empty rows kept back until a later row has data
+    for row in rows:
+        while row and row[-1] == "":
+            row.pop()
+        if not row:
+            pending_blank += 1
+            continue
+        for _ in range(pending_blank):
+            batch.append([])
+            if len(batch) >= batch_rows:
+                yield batch
+                batch = []
+        pending_blank = 0
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,14 @@
+-- Unique index on tblFile.NameFile.
+-- insert_file_to_db relies on this index to reject duplicate file names
+-- inside the INSERT itself (error 2601/2627) instead of a COUNT(*) pre-check,
+-- so two operators importing the same file at once cannot both succeed.
+-- Remove existing duplicates before running this script (NameFile must be
+-- NVARCHAR(450) or shorter to be indexed).
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'UX_tblFile_NameFile' AND object_id = OBJECT_ID('dbo.tblFile')
+)
+BEGIN
+    CREATE UNIQUE NONCLUSTERED INDEX UX_tblFile_NameFile ON dbo.tblFile (NameFile);
+END
+GO
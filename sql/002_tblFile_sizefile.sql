@@ -0,0 +1,9 @@
+-- Expected size in bytes of tblFile.binDataFile.
+-- Large files are uploaded in chunks with UPDATE ... binDataFile.WRITE; a row
+-- whose DATALENGTH(binDataFile) is still below SizeFile is an interrupted
+-- upload that the next import of the same file resumes, and Gen File skips it.
+IF COL_LENGTH('dbo.tblFile', 'SizeFile') IS NULL
+BEGIN
+    ALTER TABLE dbo.tblFile ADD SizeFile BIGINT NULL;
+END
+GO
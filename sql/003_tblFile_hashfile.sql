@@ -0,0 +1,34 @@
+-- Content hash of each imported file and the Gen File load record.
+-- insert_file_to_db stores the SHA-256 of the file in HashFile and rejects a file
+-- whose content is already in tblFile (indexed lookup); a file with the same name
+-- but new content replaces the old row.
+-- tblFileLoad remembers which file content (HashFile at position FileIndex) each
+-- Gen File target table currently holds, so an unchanged file is not parsed or
+-- loaded again while all of its TableCount tables still hold its data.
+IF COL_LENGTH('dbo.tblFile', 'HashFile') IS NULL
+BEGIN
+    ALTER TABLE dbo.tblFile ADD HashFile BINARY(32) NULL;
+END
+GO
+
+IF NOT EXISTS (
+    SELECT 1 FROM sys.indexes
+    WHERE name = 'IX_tblFile_HashFile' AND object_id = OBJECT_ID('dbo.tblFile')
+)
+BEGIN
+    CREATE NONCLUSTERED INDEX IX_tblFile_HashFile ON dbo.tblFile (HashFile) INCLUDE (NameFile);
+END
+GO
+
+IF OBJECT_ID('dbo.tblFileLoad') IS NULL
+BEGIN
+    CREATE TABLE dbo.tblFileLoad (
+        TableName NVARCHAR(128) NOT NULL PRIMARY KEY,
+        HashFile BINARY(32) NOT NULL,
+        FileIndex INT NOT NULL,
+        TableCount INT NOT NULL,
+        LoadedAt DATETIME2 NOT NULL DEFAULT SYSUTCDATETIME()
+    );
+    CREATE NONCLUSTERED INDEX IX_tblFileLoad_HashFile ON dbo.tblFileLoad (HashFile, FileIndex);
+END
+GO
@@ -0,0 +1,11 @@
+-- Optional per-job column types for typed Gen File loads (GENFILE_TYPED_LOAD=1).
+-- xSchema holds a JSON object mapping column numbers to SQL Server types, e.g.
+--   {"0": "nvarchar(20)", "1": "int", "2": "decimal(12,2)", "3": "date"}
+-- Supported types: smallint, int, bigint, decimal(p,s), float, date, datetime,
+-- nvarchar(n), nvarchar(max). Columns not listed are inferred from a sample.
+-- Leave xSchema NULL to infer every column.
+IF COL_LENGTH('dbo.tblFileJob', 'xSchema') IS NULL
+BEGIN
+    ALTER TABLE dbo.tblFileJob ADD xSchema NVARCHAR(MAX) NULL;
+END
+GO
@@ -0,0 +1,45 @@
+-- Optional per-job load modes for Gen File.
+-- xLoadMode:   'replace' (default when NULL) recreates the job's tables from the latest files,
+--              'append' adds the rows of new files to the job's tables,
+--              'merge' updates rows whose key columns match and inserts the rest (staging table + MERGE).
+-- xKeyColumns: comma-separated column numbers that identify a row for 'merge', e.g. '0,2'.
+-- xTableName:  fixed base table name for the job (sheets of an XLSX file get _0, _1, ...);
+--              when NULL, 'append' and 'merge' jobs use tblImport<DB_WH>_<job name>.
+IF COL_LENGTH('dbo.tblFileJob', 'xLoadMode') IS NULL
+BEGIN
+    ALTER TABLE dbo.tblFileJob ADD xLoadMode NVARCHAR(10) NULL;
+END
+GO
+
+IF COL_LENGTH('dbo.tblFileJob', 'xKeyColumns') IS NULL
+BEGIN
+    ALTER TABLE dbo.tblFileJob ADD xKeyColumns NVARCHAR(400) NULL;
+END
+GO
+
+IF COL_LENGTH('dbo.tblFileJob', 'xTableName') IS NULL
+BEGIN
+    ALTER TABLE dbo.tblFileJob ADD xTableName NVARCHAR(100) NULL;
+END
+GO
+
+-- An 'append' or 'merge' table holds the content of many files, so tblFileLoad keeps
+-- one row per (TableName, HashFile) instead of one row per TableName.
+-- Those rows have FileIndex -1: the file's position in tblFile does not matter for them.
+-- The same layout lets Gen File keep a row for an XLSX file whose shared sheet tables were
+-- overwritten by a later file (at the file's own FileIndex), so the file is not parsed again each run.
+DECLARE @pk SYSNAME = (
+    SELECT kc.name FROM sys.key_constraints kc
+    WHERE kc.parent_object_id = OBJECT_ID('dbo.tblFileLoad') AND kc.type = 'PK'
+);
+IF @pk IS NOT NULL AND (
+    SELECT COUNT(*) FROM sys.index_columns ic
+    JOIN sys.key_constraints kc ON kc.parent_object_id = ic.object_id AND kc.unique_index_id = ic.index_id
+    WHERE kc.name = @pk
+) = 1
+BEGIN
+    DECLARE @drop NVARCHAR(300) = N'ALTER TABLE dbo.tblFileLoad DROP CONSTRAINT ' + QUOTENAME(@pk);
+    EXEC(@drop);
+    ALTER TABLE dbo.tblFileLoad ADD CONSTRAINT PK_tblFileLoad PRIMARY KEY (TableName, HashFile);
+END
+GO
@@ -0,0 +1,23 @@
+import time
+
+# Taken before anything else is imported, so the report includes loading .env
+_start = time.perf_counter()
+
+import os
+import threading  # Import threading module
+import config  # Loads .env once for every module
+
+# Set STARTUP_TIMING=1 to append startup milestones to STARTUP_TIMING_LOG (works without a console)
+enabled = os.getenv("STARTUP_TIMING", "0") != "0"
+log_path = os.getenv("STARTUP_TIMING_LOG", "startup_timing.log")
+
+_lock = threading.Lock()
+
+# Function to record how long after start-up a milestone was reached
+def mark(label):
+    if not enabled:
+        return
+    elapsed_ms = (time.perf_counter() - _start) * 1000
+    with _lock:
+        with open(log_path, "a", encoding="utf-8") as log_file:
+            log_file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {elapsed_ms:9.1f} ms  {label}\n")
@@ -0,0 +1,80 @@
+import os
+import queue
+import threading  # Import threading module
+import tkinter as tk
+from tkinter import messagebox
+import config  # Loads .env once for every module
+
+# How often the main thread drains posted events, and how many it runs per pass (override in .env)
+poll_interval_ms = int(os.getenv("UI_POLL_MS", "50"))
+max_events_per_poll = int(os.getenv("UI_MAX_EVENTS_PER_POLL", "200"))
+
+# Most problems listed in one summary dialog
+SUMMARY_LIMIT = 20
+
+# Events posted by worker threads: (callback, args), run in order on the Tk main thread
+_events = queue.Queue()
+
+# Latest pending (callback, args) per key for events where only the newest value matters (progress)
+_latest_lock = threading.Lock()
+_latest = {}
+
+_started = False
+
+# Function to start draining posted events on the Tk main thread (call once, from the main thread)
+def start(root):
+    global _started
+    if _started:
+        return
+    _started = True
+    root.after(poll_interval_ms, _drain, root)
+
+# Function to run the events posted since the last pass, then schedule the next pass
+def _drain(root):
+    for _ in range(max_events_per_poll):
+        try:
+            callback, args = _events.get_nowait()
+        except queue.Empty:
+            break
+        try:
+            callback(*args)
+        except tk.TclError:
+            pass  # The window the event was for has been closed
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to update the window: {str(e)}")
+    root.after(poll_interval_ms, _drain, root)
+
+# Function to run callback(*args) on the Tk main thread; safe to call from any thread and never blocks
+def post(callback, *args):
+    _events.put((callback, args))
+
+# Function to post an event that replaces any not-yet-run event with the same key
+# Used for progress and throughput so a fast worker cannot flood the main thread
+def post_latest(key, callback, *args):
+    with _latest_lock:
+        pending = key in _latest
+        _latest[key] = (callback, args)
+    if not pending:
+        _events.put((_run_latest, (key,)))
+
+def _run_latest(key):
+    with _latest_lock:
+        callback, args = _latest.pop(key)
+    callback(*args)
+
+# Function to show a message box from any thread; level is "info", "warning" or "error"
+def show(level, title, message):
+    post(getattr(messagebox, f"show{level}"), title, message)
+
+# Function to show a batch result and every problem collected during it as one dialog
+# problems is a list of (level, title, message) that workers appended to while the batch ran
+def show_summary(title, message, problems):
+    levels = {level for level, _, _ in problems}
+    level = "error" if "error" in levels else "warning" if levels else "info"
+    lines = [message]
+    if problems:
+        lines.append(f"\nProblems ({len(problems)}):")
+        lines += [f"- {problem_title}: {problem_message}" for _, problem_title, problem_message in problems[:SUMMARY_LIMIT]]
+        if len(problems) > SUMMARY_LIMIT:
+            lines.append(f"... and {len(problems) - SUMMARY_LIMIT} more")
+    show(level, title, "\n".join(lines))
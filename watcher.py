@@ -0,0 +1,218 @@
+import argparse
+import json
+import multiprocessing  # Gen File parses on a process pool
+import os
+import re
+import sys
+import time
+import config  # Loads .env once for every module
+import bulkload  # Bulk-load strategies for DataFrames
+import filestore  # tblFile storage operations
+import genfile  # Parallel Gen File pipeline
+import instrument  # Per-stage timings and round-trip counts
+import jobcache  # Cached tblFileJob metadata
+
+# Watched-folder mode: every job in tblFileJob gets a folder under WATCH_ROOT named after the job.
+# Files with the job's extension are imported once their size and modification time stop changing;
+# arrivals are grouped into micro-batches, each imported and run through Gen File before the next scan.
+# Example: python watcher.py --root "D:\drop"
+# Prints one JSON line per batch to stdout; no tkinter is imported.
+
+# Watcher settings (override in .env)
+watch_root = os.getenv("WATCH_ROOT", "")  # Folder holding one sub-folder per job
+poll_seconds = float(os.getenv("WATCH_POLL_SECONDS", "1"))  # Time between folder scans
+stable_seconds = float(os.getenv("WATCH_STABLE_SECONDS", "2"))  # Size and mtime must hold this long
+batch_seconds = float(os.getenv("WATCH_BATCH_SECONDS", "3"))  # Quiet time after the last arrival before a batch runs
+batch_max_files = int(os.getenv("WATCH_BATCH_MAX", "50"))  # A batch runs at once when this many files are ready
+job_refresh_seconds = float(os.getenv("WATCH_JOB_REFRESH_SECONDS", "60"))  # How often job folders are checked (jobs come from jobcache)
+
+# Sub-folders of each job folder that finished files are moved to
+PROCESSED_FOLDER = "processed"
+FAILED_FOLDER = "failed"
+
+# Characters that cannot appear in a Windows folder name
+INVALID_FOLDER_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+# Function to map each job to its watched folder and expected extension, creating missing folders
+def job_folders(root):
+    folders = {}
+    for name_job, extension in jobcache.job_extensions().items():
+        folder = os.path.join(root, INVALID_FOLDER_CHARS.sub("_", name_job).strip())
+        for sub_folder in ("", PROCESSED_FOLDER, FAILED_FOLDER):
+            os.makedirs(os.path.join(folder, sub_folder), exist_ok=True)
+        folders[name_job] = (folder, extension)
+    return folders
+
+# Function to scan the job folders and return the (name_job, path) of files that have stopped changing
+# seen maps path -> (size, mtime, first time that size/mtime was observed) and is updated in place
+# skip maps path -> (size, mtime) of files that could not be moved out; they are ignored until they change or go away
+def scan(folders, seen, now, skip=None):
+    skip = {} if skip is None else skip
+    ready = []
+    present = set()
+    for name_job, (folder, extension) in folders.items():
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.is_file() or not entry.name.lower().endswith(extension) or entry.name.startswith(("~$", ".")):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # Removed or locked since the scan
+            present.add(entry.path)
+            signature = (stat.st_size, stat.st_mtime)
+            if skip.get(entry.path) == signature:
+                continue
+            skip.pop(entry.path, None)
+            previous = seen.get(entry.path)
+            if previous is None or previous[:2] != signature:
+                seen[entry.path] = signature + (now,)
+            elif now - previous[2] >= stable_seconds and is_readable(entry.path):
+                ready.append((name_job, entry.path))
+    for path in list(seen):
+        if path not in present:
+            del seen[path]
+    for path in list(skip):
+        if path not in present:
+            del skip[path]
+    return ready
+
+# Function to check that a file can be opened (a writer on Windows may still hold it exclusively)
+def is_readable(path):
+    try:
+        with open(path, "rb"):
+            return True
+    except OSError:
+        return False
+
+# Function to move a finished file into the processed or failed folder, keeping earlier files of the same name
+def move_file(path, sub_folder):
+    folder = os.path.join(os.path.dirname(path), sub_folder)
+    target = os.path.join(folder, os.path.basename(path))
+    if os.path.exists(target):
+        stem, extension = os.path.splitext(os.path.basename(path))
+        target = os.path.join(folder, f"{stem}_{time.strftime('%Y%m%d%H%M%S')}{extension}")
+    os.replace(path, target)
+
+# Function to remember the size and mtime of a file that could not be moved, so scan() does not import it again
+def skip_file(skip, path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return  # Gone already
+    skip[path] = (stat.st_size, stat.st_mtime)
+
+# Function to import one micro-batch (grouped per job) and run Gen File over it
+# Returns the batch stats written to the log; with PROFILE_MODE set each batch is captured (see instrument.profile)
+# Files that cannot be moved out of the job folder are added to skip (see scan)
+def process_batch(batch, dbwh, parse_workers=genfile.parse_workers, load_workers=genfile.load_workers, skip=None):
+    with instrument.profile("watch_batch"):
+        return run_batch(batch, dbwh, parse_workers, load_workers, {} if skip is None else skip)
+
+# Function to run the import and Gen File steps of process_batch()
+def run_batch(batch, dbwh, parse_workers, load_workers, skip):
+    start = time.perf_counter()
+    instrument.reset()
+    stats = {"started": time.strftime("%Y-%m-%d %H:%M:%S"), "imported": [], "gen_file": None, "problems": []}
+
+    by_job = {}
+    for name_job, path in batch:
+        by_job.setdefault(name_job, []).append(path)
+    for position, (name_job, paths) in enumerate(sorted(by_job.items())):
+        # Temporary tables are dropped once per batch, before its first file
+        results = filestore.import_files(sorted(paths), name_job, drop_temp=position == 0, workers=filestore.import_workers)
+        for result in results:
+            result["job"] = name_job
+            try:
+                move_file(result["file"], PROCESSED_FOLDER if filestore.import_succeeded(result) else FAILED_FOLDER)
+            except OSError as e:
+                skip_file(skip, result["file"])
+                stats["problems"].append({"level": "warning", "title": "Move Failed", "message": f"Failed to move '{result['file']}' (skipped until it changes): {e}"})
+        stats["imported"] += results
+
+    if any(result["status"] in (filestore.STATUS_INSERTED, filestore.STATUS_REPLACED) for result in stats["imported"]):
+        def report(level, title, message):
+            stats["problems"].append({"level": level, "title": title, "message": message})
+
+        # Unchanged files are skipped by their content hash and table name. With GENFILE_TABLE_NAMING=job or file
+        # only this batch's files are parsed and loaded; with the default index naming a new file shifts the
+        # index of every file after it in tblFile, so those files are parsed and loaded again as well
+        bulkload.reset_stats()
+        stats["gen_file"] = genfile.run_gen_file(dbwh, report=report, parse_workers=parse_workers, load_workers=load_workers)
+        stats["bulk_load"] = bulkload.strategy_stats()
+
+    stats["stages"] = instrument.stage_totals()
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+# Function to watch the job folders until interrupted (or for one pass when once is set)
+# log(stats) receives every batch's stats
+def watch(root, dbwh, log, once=False, parse_workers=genfile.parse_workers, load_workers=genfile.load_workers):
+    seen = {}
+    skip = {}  # path -> (size, mtime) of files left in place because they could not be moved
+    pending = {}  # path -> name_job of files ready for the next batch
+    last_arrival = 0.0
+    folders = {}
+    folders_read = None
+    while True:
+        now = time.monotonic()
+        if folders_read is None or now - folders_read >= job_refresh_seconds:
+            try:
+                folders = job_folders(root)
+                folders_read = now
+            except Exception as e:
+                log({"problems": [{"level": "error", "title": "Error", "message": f"Failed to read jobs: {e}"}]})
+                folders_read = folders_read or now
+
+        for name_job, path in scan(folders, seen, now, skip):
+            if path not in pending:
+                pending[path] = name_job
+                last_arrival = now
+
+        # Debounce: wait for a quiet period (or a full batch) so a burst of drops becomes one batch
+        quiet = now - last_arrival >= batch_seconds
+        if pending and (quiet or len(pending) >= batch_max_files or once):
+            batch = [(name_job, path) for path, name_job in sorted(pending.items())[:batch_max_files]]
+            for name_job, path in batch:
+                del pending[path]
+                seen.pop(path, None)
+            try:
+                log(process_batch(batch, dbwh, parse_workers, load_workers, skip))
+            except Exception as e:
+                log({"problems": [{"level": "error", "title": "Error", "message": f"Failed to process batch: {e}"}]})
+            continue  # Rescan at once: files that arrived during the batch may already be stable
+
+        if once and not pending and not any(now - first_seen < stable_seconds for _, _, first_seen in seen.values()):
+            return
+        time.sleep(poll_seconds)
+
+# Function to write one JSON line per batch to stdout
+def log_json(stats):
+    json.dump(stats, sys.stdout, default=str)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch one folder per job and import and load dropped files automatically.")
+    parser.add_argument("--root", default=watch_root, help="Folder holding one sub-folder per job (default: WATCH_ROOT)")
+    parser.add_argument("--dbwh", default=config.dbwh, help="Database warehouse identifier used in table names (default: DB_WH)")
+    parser.add_argument("--once", action="store_true", help="Process the files already present, then exit")
+    parser.add_argument("--parse-workers", type=int, default=genfile.parse_workers, help="Gen File parse processes (default: GENFILE_PARSE_WORKERS)")
+    parser.add_argument("--load-workers", type=int, default=genfile.load_workers, help="Gen File load threads (default: GENFILE_LOAD_WORKERS)")
+    args = parser.parse_args(argv)
+    if not args.root:
+        parser.error("give --root or set WATCH_ROOT")
+
+    try:
+        watch(args.root, args.dbwh, log_json, once=args.once, parse_workers=args.parse_workers, load_workers=args.load_workers)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    # Let frozen (PyInstaller) Gen File worker processes start without starting another watcher
+    multiprocessing.freeze_support()
+    sys.exit(main())